@@ -20,6 +20,9 @@ RABBITMQ_PASSWORD = os.getenv('RABBITMQ_PASSWORD')
 RABBITMQ_HEARTBEAT = 7200  #  2 часа
 RABBITMQ_TIMEOUT = 60    # 
 
+# Количество неподтверждённых сообщений, которые брокер отдаёт заранее
+RABBITMQ_PREFETCH = int(os.getenv('RABBITMQ_PREFETCH') or '100')
+
 # Основная очередь и exchange
 RABBITMQ_QUEUE = os.getenv('RABBITMQ_QUEUE')
 RABBITMQ_EXCHANGE = os.getenv('RABBITMQ_EXCHANGE')
@@ -40,6 +43,16 @@ DB_USER = os.getenv('DB_USER')
 DB_PASSWORD = os.getenv('DB_PASSWORD')
 DB_SCHEMA = os.getenv('DB_SCHEMA')
 
+# synchronous_commit для транзакций загрузки QSO. При 'off' коммит не ждет сброса WAL
+# на диск: при падении сервера БД теряются последние доли секунды, но загрузка
+# идемпотентна и повторится при следующей синхронизации
+DB_SYNCHRONOUS_COMMIT = os.getenv('DB_SYNCHRONOUS_COMMIT') or 'off'
+
+# Размер пула соединений с БД. DB_POOL_MAX = 0 - 10 соединений; в любом случае
+# не меньше 2 * потоков
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN') or '2')
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX') or '0')
+
 # Настройки приложения
 BATCH_DELAY = float(os.getenv('BATCH_DELAY') or '0.5')
 MAX_RETRIES = int(os.getenv('MAX_RETRIES') or '3')
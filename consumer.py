@@ -4,15 +4,19 @@
 
 import time
 import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Dict, Any
 
 from utils.logger import setup_logging
-from utils.signals import setup_signal_handlers
+from utils.signals import setup_signal_handlers, get_signal_name
 from utils.stats import Statistics
 from rabbitmq.connection import RabbitMQConnection
 from lotw.handler import MessageHandler
 from lotw.api import LoTWAPI
 from database.operations import DatabaseOperations
+from r150s_lookup import load_database as load_r150_database
 
 
 class LoTWConsumer:
@@ -32,8 +36,13 @@ class LoTWConsumer:
         # Инициализация компонентов
         self.logger = setup_logging()
         self.stats = Statistics(test_mode)
-        self.db_ops = DatabaseOperations(self.logger)
+        self.db_ops = DatabaseOperations(self.logger, max_workers=self.max_workers)
         self.lotw_api = LoTWAPI(self.logger)
+        # Пул потоков для обработки сообщений; число сообщений в работе
+        # ограничено prefetch_count канала RabbitMQ
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='lotw')
+        # Переданные в пул и еще не завершенные задачи - их дожидается close_connections
+        self._futures = set()
         self.message_handler = MessageHandler(
             logger=self.logger,
             stats=self.stats,
@@ -42,6 +51,10 @@ class LoTWConsumer:
             max_retries=5  # Из конфига
         )
 
+        # Справочник r150cty.dat нужен при обработке каждой QSO - загружаем его в фоне,
+        # параллельно с подключением к RabbitMQ, а не на первом сообщении
+        threading.Thread(target=load_r150_database, name='r150-preload', daemon=True).start()
+
         # Настройка
         setup_signal_handlers(self)
 
@@ -49,23 +62,43 @@ class LoTWConsumer:
 
     def signal_handler(self, signum, frame):
         """Обработчик сигналов остановки"""
-        from utils.signals import get_signal_name
         signal_name = get_signal_name(signum)
         self.logger.info(f"Получен сигнал {signal_name}, завершаю работу...")
         self.running = False
-        # Останавливаем потребление сообщений
-        if hasattr(self, 'rabbitmq') and self.rabbitmq:
-            self.rabbitmq.close()
-        self.close_connections()
+        # Только останавливаем прием сообщений: start_consuming вернется,
+        # и его finally-блок завершит работу через close_connections
+        if self.rabbitmq is not None:
+            self.rabbitmq.request_stop()
 
     def close_connections(self):
         """Корректное закрытие всех соединений"""
         self.logger.info("Закрываю соединения...")
+        # Задачи из очереди пула не запускаем - неподтвержденные сообщения вернутся в RabbitMQ
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+        # Задачи в работе подтверждают сообщения через поток соединения RabbitMQ:
+        # обслуживаем его, пока они не завершатся, и только потом закрываем
+        while True:
+            pending = [future for future in list(self._futures) if not future.done()]
+            if not pending:
+                break
+            if self.rabbitmq is None or not self.rabbitmq.process_events(time_limit=1):
+                # Соединения нет - ack все равно не дойдут, просто ждем задачи
+                wait(pending)
+
+        if self.rabbitmq is not None:
+            self.rabbitmq.close()
+        self.db_ops.close()
 
     def print_stats(self, detailed: bool = False):
         """Вывод статистики"""
-        if hasattr(self, 'stats'):
-            self.stats.print_stats(detailed=detailed)
+        self.stats.print_stats(detailed=detailed)
+
+    def on_message(self, ch, method, properties, body):
+        """Callback pika: передает сообщение в пул потоков"""
+        future = self.executor.submit(self.message_handler.handle_delivery, ch, method, properties, body)
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
 
     def process_test_tasks(self):
         """Обработка тестовых задач"""
@@ -96,6 +129,7 @@ class LoTWConsumer:
         if self.test_mode:
             self.logger.info("[TEST] Запуск в тестовом режиме")
             self.process_test_tasks()
+            self.close_connections()
             return
 
         # Инициализация RabbitMQ
@@ -108,6 +142,7 @@ class LoTWConsumer:
         self.logger.info("[RABBITMQ] Подключение...")
         if not self.rabbitmq.connect():
             self.logger.error("[RABBITMQ] Не удалось подключиться к RabbitMQ")
+            self.close_connections()
             return
 
         self.logger.info("[RABBITMQ] Успешно подключено")
@@ -118,7 +153,7 @@ class LoTWConsumer:
             # Запуск прослушивания
             self.logger.info("[CONSUME] Запуск прослушивания очереди...")
             self.rabbitmq.start_consuming(
-                message_handler=self.message_handler.handle_delivery,
+                message_handler=self.on_message,
                 stats_callback=self.stats.update_worker_count
             )
 
@@ -126,15 +161,13 @@ class LoTWConsumer:
             self.logger.info("\n[STOP] Остановлено пользователем")
         except Exception as e:
             self.logger.error(f"[ERROR] Ошибка в основном цикле: {e}")
-            import traceback
             self.logger.error(f"[TRACE] {traceback.format_exc()}")
         finally:
             self.logger.info("[CLEANUP] Закрытие...")
-            if self.rabbitmq:
-                try:
-                    self.rabbitmq.close()
-                except Exception:
-                    pass
+            try:
+                self.close_connections()
+            except Exception as e:
+                self.logger.error(f"[ERROR] Ошибка при закрытии: {e}")
             self.logger.info("[DONE] Consumer завершен")
 
 
@@ -150,7 +183,6 @@ def main():
         consumer.start_consuming()
     except Exception as e:
         print(f"Критическая ошибка: {e}")
-        import traceback
         traceback.print_exc()
         sys.exit(1)
 
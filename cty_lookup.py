@@ -4,12 +4,29 @@
 
 import re
 import os
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+import sys
+import logging
+import threading
+import functools
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+# Максимальный размер кэша результатов find_by_callsign
+LOOKUP_CACHE_SIZE = 65536
+
+_MISSING = object()
+
+# Альтернативные зоны в исключениях: (CQ) и [ITU]
+_ALT_ZONE_RE = re.compile(r'\((\d+)\)|\[(\d+)\]')
+
+# R0, R8, R9 должны быть UA9 (Asiatic Russia), а не European Russia
+_EU_RUSSIA_EXCLUDED = ('R0', 'R8', 'R9')
+
+
+@dataclass(slots=True, frozen=True)
 class CTYEntry:
     """Класс для хранения информации о стране из cty.dat"""
     name: str
@@ -20,10 +37,10 @@ class CTYEntry:
     lon: float
     timezone: float
     primary_prefix: str
-    prefixes: List[str]
+    prefixes: Tuple[str, ...]
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CTYException:
     """Класс для хранения исключений из cty.dat (позывные с = или особые префиксы)"""
     callsign_or_prefix: str  # Позывной или префикс с = или без
@@ -38,17 +55,36 @@ class CTYException:
     entry_continent: Optional[str] = None  # Континент из записи
 
 
+class _PrefixTrieNode:
+    """Узел префиксного дерева: переходы по символам и записи для префикса/исключения"""
+    __slots__ = ('children', 'entry', 'exception_entry')
+
+    def __init__(self):
+        self.children: Dict[str, '_PrefixTrieNode'] = {}
+        self.entry: Optional[CTYEntry] = None
+        self.exception_entry: Optional[CTYEntry] = None
+
+
 class CTYDatabase:
-    """База данных CTY (cty.dat)"""
+    """
+    База данных CTY (cty.dat).
+    Каждый экземпляр заново разбирает файл - в рабочем коде используйте
+    get_cty_database(), прямое создание нужно только для тестов
+    """
 
     def __init__(self, filename: str = None):
         self.entries: List[CTYEntry] = []
         self.prefix_map: Dict[str, CTYEntry] = {}
+        self._prefix_trie = _PrefixTrieNode()  # Префиксы и исключения в виде дерева для поиска
         self.exceptions: List[CTYException] = []  # Список исключений
+        self.callsign_exceptions: Dict[str, CTYException] = {}  # Исключения =позывной
+        self.prefix_exceptions: Dict[str, CTYException] = {}  # Особые префиксы без =
+        # Готовые CTYEntry для исключений (=позывные имеют приоритет над префиксами)
+        self._exception_entries: Dict[str, CTYEntry] = {}
+        self._lookup_cache: Dict[str, Optional[CTYEntry]] = {}  # Кэш результатов поиска
 
         if filename is None:
             # Ищем в текущей директории или в директории проекта
-            import os
             current_dir = os.path.dirname(os.path.abspath(__file__))
             filename = os.path.join(current_dir, 'cty.dat')
             if not os.path.exists(filename):
@@ -57,21 +93,26 @@ class CTYDatabase:
         if os.path.exists(filename):
             self._load_file(str(filename))
         else:
-            print(f"Файл {filename} не найден!")
+            logger.error(f"Файл {filename} не найден!")
 
     def _load_file(self, filename: str):
         """Загружает и парсит файл cty.dat"""
+        # После перезагрузки базы ранее найденные результаты неактуальны
+        self._lookup_cache.clear()
+        _lookup_dxcc_prefix.cache_clear()
+        _lookup_dxcc_info.cache_clear()
         try:
             with open(filename, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                self._parse_cty_dat(content)
+                # Читаем построчно, не загружая весь файл в память
+                self._parse_cty_dat(f)
         except Exception as e:
-            print(f"Ошибка загрузки cty.dat: {e}")
+            logger.error(f"Ошибка загрузки cty.dat: {e}")
 
-    def _parse_cty_dat(self, content: str):
-        """Парсит файл cty.dat"""
-        lines = content.strip().split('\n')
+    def _parse_cty_dat(self, lines: Iterable[str]):
+        """Парсит строки файла cty.dat (подходит открытый файл)"""
+        # Префиксы копятся в списке, запись собирается с ними в конце блока
         current_entry = None
+        current_prefixes: List[str] = []
 
         for line in lines:
             line = line.rstrip()
@@ -84,30 +125,27 @@ class CTYDatabase:
             # Проверяем, является ли строка началом записи
             if ':' in line and line.count(':') >= 6:
                 # Сохраняем предыдущую запись
-                if current_entry and current_entry.prefixes:
-                    self._add_entry(current_entry)
+                if current_entry:
+                    self._emit_entry(current_entry, current_prefixes)
+                current_prefixes = []
 
                 parts = [p.strip() for p in line.split(':')]
+                # Континенты и префиксы повторяются между записями - храним один экземпляр строки
                 current_entry = CTYEntry(
-                    name=parts[0],
+                    name=sys.intern(parts[0]),
                     cq_zone=int(parts[1]) if parts[1] else 0,
                     itu_zone=int(parts[2]) if parts[2] else 0,
-                    continent=parts[3],
+                    continent=sys.intern(parts[3]),
                     lat=float(parts[4]) if parts[4] else 0.0,
                     lon=float(parts[5]) if parts[5] else 0.0,
                     timezone=float(parts[6]) if parts[6] else 0.0,
-                    primary_prefix=parts[7] if len(parts) > 7 and parts[7] else "",
-                    prefixes=[]
+                    primary_prefix=sys.intern(parts[7]) if len(parts) > 7 and parts[7] else "",
+                    prefixes=()
                 )
 
                 # Парсим префиксы из той же строки (после 7-го :)
                 if len(parts) > 8 and parts[8]:
-                    # Проверяем исключения
-                    if '=' in parts[8] or '[' in parts[8]:
-                        self._parse_exceptions(parts[8], current_entry)
-
-                    prefixes = self._parse_prefixes(parts[8])
-                    current_entry.prefixes.extend(prefixes)
+                    current_prefixes.extend(self._parse_line(parts[8], current_entry))
 
             elif current_entry and (line.startswith('    ') or line.startswith('\t')):
                 # Строка с дополнительными префиксами
@@ -116,28 +154,30 @@ class CTYDatabase:
                     if line.endswith(';'):
                         line = line[:-1]
 
-                    # Проверяем, есть ли исключения (= или [число])
-                    has_exceptions = '=' in line or '[' in line
-                    has_normal_prefixes = any(c for c in line if c.isalpha() or c.isdigit()) and not line.startswith('=')
-
-                    if has_exceptions:
-                        self._parse_exceptions(line, current_entry)
-
-                    # Парсим обычные префиксы
-                    prefixes = self._parse_prefixes(line)
-                    # R0, R8, R9 должны быть UA9 (Asiatic Russia), а не European Russia
-                    if current_entry.name == 'European Russia':
-                        prefixes = [p for p in prefixes if not (p.startswith('R0') or p.startswith('R8') or p.startswith('R9'))]
-                    current_entry.prefixes.extend(prefixes)
+                    # Парсим исключения и обычные префиксы
+                    current_prefixes.extend(self._parse_line(line, current_entry))
 
         # Сохраняем последнюю запись
-        if current_entry and current_entry.prefixes:
-            self._add_entry(current_entry)
-
-        print(f"Загружено {len(self.entries)} стран из cty.dat")
+        if current_entry:
+            self._emit_entry(current_entry, current_prefixes)
+
+        logger.info(f"Загружено {len(self.entries)} стран из cty.dat")
+
+    def _emit_entry(self, entry: CTYEntry, prefixes: List[str]):
+        """Завершает запись: прикрепляет накопленные префиксы и добавляет в базу"""
+        if entry.name == 'European Russia':
+            prefixes = [p for p in prefixes if not p.startswith(_EU_RUSSIA_EXCLUDED)]
+        if prefixes:
+            self._add_entry(replace(entry, prefixes=tuple(prefixes)))
+
+    def _parse_line(self, prefix_line: str, entry: CTYEntry) -> List[str]:
+        """
+        Парсит строку с префиксами за один проход: исключения (=позывные или
+        особые префиксы) регистрируются сразу, обычные префиксы возвращаются
+        """
+        # Если в строке есть = или [число], все ее элементы считаются исключениями
+        has_exceptions = '=' in prefix_line or '[' in prefix_line
 
-    def _parse_prefixes(self, prefix_line: str) -> List[str]:
-        """Парсит строку с префиксами"""
         prefixes = []
         prefix_line = prefix_line.strip()
 
@@ -150,165 +190,160 @@ class CTYDatabase:
             if not part:
                 continue
 
-            # Убираем комментарии и служебную информацию
-            if '(' in part:
-                part = part.split('(')[0]
-            if '[' in part:
-                part = part.split('[')[0]
             if '=' in part:
-                continue  # Пропускаем специальные префиксы (они парсятся отдельно)
-
-            part = part.strip()
-            if part:
-                prefixes.append(part)
+                # Это исключение типа =8J1RL(39)[67], в обычные префиксы не попадает
+                self._add_exception(part, entry)
+                continue
 
-        return prefixes
+            if has_exceptions:
+                # Это особый префикс без = (например, 3Y[73])
+                self._add_exception(part, entry)
 
-    def _parse_exceptions(self, prefix_line: str, entry: CTYEntry):
-        """Парсит исключения из строки (=позывные или особые префиксы)"""
-        prefix_line = prefix_line.strip()
-        if ';' in prefix_line:
-            prefix_line = prefix_line.split(';')[0]
+            # Убираем комментарии и служебную информацию
+            prefix = self._strip_zone_suffix(part).strip()
+            if prefix:
+                prefixes.append(sys.intern(prefix))
 
-        parts = prefix_line.split(',')
-        for part in parts:
-            part = part.strip()
-            if not part:
-                continue
+        return prefixes
 
-            # Проверяем на наличие = (исключение)
-            if '=' in part:
-                # Это исключение типа =8J1RL(39)[67]
-                exception_part = part
-                cq_zone = entry.cq_zone
-                itu_zone = entry.itu_zone
-                cq_zone_alt = None
-                itu_zone_alt = None
-
-                # Ищем (число) для cq_zone_alt
-                cq_match = re.search(r'\((\d+)\)', exception_part)
-                if cq_match:
-                    cq_zone_alt = int(cq_match.group(1))
-
-                # Ищем [число] для itu_zone_alt
-                itu_match = re.search(r'\[(\d+)\]', exception_part)
-                if itu_match:
-                    itu_zone_alt = int(itu_match.group(1))
-
-                # Извлекаем позывной или префикс (часть до '(' или '[' или '=')
-                clean_part = exception_part.split('(')[0].split('[')[0]
-                if clean_part.startswith('='):
-                    clean_part = clean_part[1:]  # Убираем =
-
-                if clean_part:
-                    exception = CTYException(
-                        callsign_or_prefix=clean_part,
-                        cq_zone=cq_zone,
-                        itu_zone=itu_zone,
-                        primary_prefix=entry.primary_prefix,
-                        cq_zone_alt=cq_zone_alt,
-                        itu_zone_alt=itu_zone_alt,
-                        entry_name=entry.name,
-                        entry_lat=entry.lat,
-                        entry_lon=entry.lon,
-                        entry_continent=entry.continent
-                    )
-                    self.exceptions.append(exception)
-            else:
-                # Это особый префикс без = (например, 3Y[73])
-                cq_zone = entry.cq_zone
-                itu_zone = entry.itu_zone
-                cq_zone_alt = None
-                itu_zone_alt = None
-
-                # Ищем (число) для cq_zone_alt
-                cq_match = re.search(r'\((\d+)\)', part)
-                if cq_match:
-                    cq_zone_alt = int(cq_match.group(1))
-
-                # Ищем [число] для itu_zone_alt
-                itu_match = re.search(r'\[(\d+)\]', part)
-                if itu_match:
-                    itu_zone_alt = int(itu_match.group(1))
-
-                # Извлекаем префикс (часть до '(' или '[')
-                clean_part = part.split('(')[0].split('[')[0]
-                if clean_part:
-                    exception = CTYException(
-                        callsign_or_prefix=clean_part,
-                        cq_zone=cq_zone,
-                        itu_zone=itu_zone,
-                        primary_prefix=entry.primary_prefix,
-                        cq_zone_alt=cq_zone_alt,
-                        itu_zone_alt=itu_zone_alt,
-                        entry_name=entry.name,
-                        entry_lat=entry.lat,
-                        entry_lon=entry.lon,
-                        entry_continent=entry.continent
-                    )
-                    self.exceptions.append(exception)
+    @staticmethod
+    def _strip_zone_suffix(part: str) -> str:
+        """Отрезает от элемента все, начиная с первой '(' или '['"""
+        # У большинства элементов скобок нет - тогда строку не копируем
+        if '(' in part or '[' in part:
+            part = part.partition('(')[0].partition('[')[0]
+        return part
+
+    def _add_exception(self, part: str, entry: CTYEntry):
+        """Добавляет исключение из элемента строки префиксов"""
+        is_callsign = '=' in part
+
+        # Ищем (число) для cq_zone_alt и [число] для itu_zone_alt за один проход,
+        # берем первое вхождение каждого вида
+        cq_zone_alt = None
+        itu_zone_alt = None
+        if '(' in part or '[' in part:
+            for match in _ALT_ZONE_RE.finditer(part):
+                cq_value, itu_value = match.groups()
+                if cq_value is not None and cq_zone_alt is None:
+                    cq_zone_alt = int(cq_value)
+                elif itu_value is not None and itu_zone_alt is None:
+                    itu_zone_alt = int(itu_value)
+
+        # Извлекаем позывной или префикс (часть до '(' или '[')
+        clean_part = self._strip_zone_suffix(part)
+        if is_callsign and clean_part.startswith('='):
+            clean_part = clean_part[1:]  # Убираем =
+        if not clean_part:
+            return
+        clean_part = sys.intern(clean_part)
+
+        exception = CTYException(
+            callsign_or_prefix=clean_part,
+            cq_zone=entry.cq_zone,
+            itu_zone=entry.itu_zone,
+            primary_prefix=entry.primary_prefix,
+            cq_zone_alt=cq_zone_alt,
+            itu_zone_alt=itu_zone_alt,
+            entry_name=entry.name,
+            entry_lat=entry.lat,
+            entry_lon=entry.lon,
+            entry_continent=entry.continent
+        )
+        self.exceptions.append(exception)
+        if is_callsign:
+            if clean_part not in self.callsign_exceptions:
+                self.callsign_exceptions[clean_part] = exception
+                self._exception_entries[clean_part] = self._entry_from_exception(exception)
+        elif clean_part not in self.prefix_exceptions:
+            self.prefix_exceptions[clean_part] = exception
+            self._exception_entries.setdefault(clean_part, self._entry_from_exception(exception))
+        self._trie_node(clean_part).exception_entry = self._exception_entries[clean_part]
 
     def _add_entry(self, entry: CTYEntry):
         """Добавляет запись в базу данных"""
         self.entries.append(entry)
 
+        prefix_map = self.prefix_map
         for prefix in entry.prefixes:
-            if prefix not in self.prefix_map:
-                self.prefix_map[prefix] = entry
+            # Первая запись с префиксом остается в силе - и в словаре, и в дереве
+            if prefix_map.setdefault(prefix, entry) is entry:
+                self._trie_node(prefix).entry = entry
+
+    def _trie_node(self, key: str) -> _PrefixTrieNode:
+        """Возвращает узел дерева префиксов для ключа, создавая недостающие"""
+        node = self._prefix_trie
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _PrefixTrieNode()
+            node = child
+        return node
+
+    def _find_exception(self, key: str) -> Optional[CTYException]:
+        """Ищет исключение (=позывной или особый префикс) по точному ключу"""
+        exception = self.callsign_exceptions.get(key)
+        if exception is None:
+            exception = self.prefix_exceptions.get(key)
+        return exception
+
+    @staticmethod
+    def _entry_from_exception(exception: CTYException) -> CTYEntry:
+        """Собирает CTYEntry из исключения с учетом альтернативных зон"""
+        final_cq_zone = exception.cq_zone_alt if exception.cq_zone_alt is not None else exception.cq_zone
+        final_itu_zone = exception.itu_zone_alt if exception.itu_zone_alt is not None else exception.itu_zone
+
+        return CTYEntry(
+            name=exception.entry_name if exception.entry_name else exception.primary_prefix,
+            cq_zone=final_cq_zone,
+            itu_zone=final_itu_zone,
+            continent=exception.entry_continent if exception.entry_continent else "",
+            lat=exception.entry_lat if exception.entry_lat is not None else 0.0,
+            lon=exception.entry_lon if exception.entry_lon is not None else 0.0,
+            timezone=0.0,
+            primary_prefix=exception.primary_prefix,
+            prefixes=()
+        )
 
     def find_by_callsign(self, callsign: str) -> Optional[CTYEntry]:
-        """Находит страну по позывному"""
-        callsign = callsign.upper().strip()
-
+        """Находит страну по позывному (результаты кэшируются)"""
+        return self._find_normalized(callsign.upper().strip())
+
+    def _find_normalized(self, callsign: str) -> Optional[CTYEntry]:
+        """Поиск по уже нормализованному позывному через кэш"""
+        entry = self._lookup_cache.get(callsign, _MISSING)
+        if entry is _MISSING:
+            entry = self._find_by_callsign(callsign)
+            if len(self._lookup_cache) >= LOOKUP_CACHE_SIZE:
+                self._lookup_cache.clear()
+            self._lookup_cache[callsign] = entry
+        return entry
+
+    def _find_by_callsign(self, callsign: str) -> Optional[CTYEntry]:
+        """Поиск страны по уже нормализованному позывному (без кэша)"""
         # Сначала проверяем исключения (=позывные) для этого конкретного позывного
-        for exception in self.exceptions:
-            if callsign == exception.callsign_or_prefix:
-                # Используем данные из записи, где определено исключение
-                # Используем альтернативные зоны, если они указаны
-                final_cq_zone = exception.cq_zone_alt if exception.cq_zone_alt is not None else exception.cq_zone
-                final_itu_zone = exception.itu_zone_alt if exception.itu_zone_alt is not None else exception.itu_zone
-
-                return CTYEntry(
-                    name=exception.entry_name if exception.entry_name else exception.primary_prefix,
-                    cq_zone=final_cq_zone,
-                    itu_zone=final_itu_zone,
-                    continent=exception.entry_continent if exception.entry_continent else "",
-                    lat=exception.entry_lat if exception.entry_lat is not None else 0.0,
-                    lon=exception.entry_lon if exception.entry_lon is not None else 0.0,
-                    timezone=0.0,
-                    primary_prefix=exception.primary_prefix,
-                    prefixes=[]
-                )
-
-        # Затем ищем в обычной базе (проверяем разные длины префикса)
-        for length in range(len(callsign), 0, -1):
-            prefix = callsign[:length]
-            if prefix in self.prefix_map:
-                entry = self.prefix_map[prefix]
-                return entry
-
-        # Если не найдено в обычной базе, проверяем исключения-префиксы
-        for exception in self.exceptions:
-            # Исключения-префиксы - это те, которые короче позывного и не совпадают полностью
-            if len(exception.callsign_or_prefix) < len(callsign):
-                if callsign.startswith(exception.callsign_or_prefix):
-                    # Используем альтернативные зоны, если они указаны
-                    final_cq_zone = exception.cq_zone_alt if exception.cq_zone_alt is not None else exception.cq_zone
-                    final_itu_zone = exception.itu_zone_alt if exception.itu_zone_alt is not None else exception.itu_zone
-
-                    return CTYEntry(
-                        name=exception.entry_name if exception.entry_name else exception.primary_prefix,
-                        cq_zone=final_cq_zone,
-                        itu_zone=final_itu_zone,
-                        continent=exception.entry_continent if exception.entry_continent else "",
-                        lat=exception.entry_lat if exception.entry_lat is not None else 0.0,
-                        lon=exception.entry_lon if exception.entry_lon is not None else 0.0,
-                        timezone=0.0,
-                        primary_prefix=exception.primary_prefix,
-                        prefixes=[]
-                    )
-
-        return None
+        entry = self._exception_entries.get(callsign)
+        if entry is not None:
+            # Используем данные из записи, где определено исключение
+            return entry
+
+        # Затем один раз спускаемся по дереву префиксов. Самый длинный обычный
+        # префикс имеет приоритет; исключения-префиксы (короче позывного)
+        # используются, только если обычный префикс не найден
+        node = self._prefix_trie
+        best = None
+        best_exception = None
+        last = len(callsign) - 1
+        for i, char in enumerate(callsign):
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.entry is not None:
+                best = node.entry
+            if node.exception_entry is not None and i < last:
+                best_exception = node.exception_entry
+
+        return best if best is not None else best_exception
 
     def get_dxcc_prefix(self, callsign: str) -> Optional[str]:
         """Возвращает DXCC префикс для позывного"""
@@ -327,24 +362,40 @@ class CTYDatabase:
 
 # Глобальный экземпляр
 _cty_db = None
+_cty_db_lock = threading.Lock()
 
 def get_cty_database() -> CTYDatabase:
-    """Возвращает глобальный экземпляр базы"""
+    """
+    Возвращает глобальный экземпляр базы, загружая его при первом обращении.
+    Потоки, обратившиеся во время загрузки, ждут ее завершения.
+    Для прогрева при старте процесса достаточно вызвать функцию заранее.
+    """
     global _cty_db
     if _cty_db is None:
-        _cty_db = CTYDatabase()
+        with _cty_db_lock:
+            if _cty_db is None:
+                _cty_db = CTYDatabase()
     return _cty_db
 
+@functools.lru_cache(maxsize=LOOKUP_CACHE_SIZE)
+def _lookup_dxcc_prefix(callsign_upper: str) -> Optional[str]:
+    """Кэшируемая часть get_dxcc_from_cty: ключ - уже нормализованный позывной"""
+    entry = get_cty_database()._find_normalized(callsign_upper)
+    # Всегда возвращаем primary_prefix (UA9 для Asiatic Russia, UA для European Russia)
+    return entry.primary_prefix if entry and entry.primary_prefix else None
+
+
 def get_dxcc_from_cty(callsign: str) -> Optional[str]:
     """Возвращает DXCC префикс по позывному из cty.dat"""
-    db = get_cty_database()
-    return db.get_dxcc_prefix(callsign)
+    return _lookup_dxcc_prefix(callsign.upper().strip())
 
 
-def get_dxcc_info(callsign: str) -> Optional[Dict]:
-    """Возвращает полную информацию о стране DXCC для позывного"""
+@functools.lru_cache(maxsize=LOOKUP_CACHE_SIZE)
+def _lookup_dxcc_info(callsign_upper: str) -> Optional[Tuple[CTYEntry, Optional[int], Optional[int]]]:
+    """Кэшируемая часть get_dxcc_info: запись и альтернативные зоны (кортеж неизменяем)"""
     db = get_cty_database()
-    entry = db.find_by_callsign(callsign)
+    # Позывной уже нормализован в get_dxcc_info
+    entry = db._find_normalized(callsign_upper)
 
     if not entry:
         return None
@@ -352,13 +403,23 @@ def get_dxcc_info(callsign: str) -> Optional[Dict]:
     # Проверяем, есть ли альтернативные зоны для этого позывного
     cq_zone_alt = None
     itu_zone_alt = None
-    callsign_upper = callsign.upper().strip()
-    for exception in db.exceptions:
-        if callsign_upper == exception.callsign_or_prefix:
-            cq_zone_alt = exception.cq_zone_alt
-            itu_zone_alt = exception.itu_zone_alt
-            break
+    exception = db._find_exception(callsign_upper)
+    if exception is not None:
+        cq_zone_alt = exception.cq_zone_alt
+        itu_zone_alt = exception.itu_zone_alt
+
+    return entry, cq_zone_alt, itu_zone_alt
+
 
+def get_dxcc_info(callsign: str) -> Optional[Dict]:
+    """Возвращает полную информацию о стране DXCC для позывного"""
+    found = _lookup_dxcc_info(callsign.upper().strip())
+
+    if not found:
+        return None
+
+    # Словарь собирается на каждый вызов: вызывающий код может его изменять
+    entry, cq_zone_alt, itu_zone_alt = found
     return {
         'callsign': callsign,
         'country': entry.name,
@@ -398,7 +459,7 @@ def print_dxcc_info(callsign: str):
 
 
 if __name__ == "__main__":
-    db = CTYDatabase()
+    db = get_cty_database()
 
     test_callsigns = ['RA4FG', 'UA9ABC', 'UA2ABC', 'DL1ABC', 'K1ABC', 'UB2FGA', 'UA1ABC']
     print("\nТест DXCC из cty.dat:")
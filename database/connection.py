@@ -2,46 +2,100 @@
 Модуль для работы с подключением к базе данных
 """
 
+import threading
 import psycopg2
+import psycopg2.pool
 from psycopg2.extras import RealDictCursor
 from typing import Optional
 
-from config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD, DB_SCHEMA
+from config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD, DB_SCHEMA, DB_POOL_MIN, DB_POOL_MAX
+
+
+# Сервер делит параметр options на аргументы по пробельным символам;
+# обратная косая черта экранирует следующий символ
+_OPTION_SPECIAL_CHARS = frozenset('\\ \t\n\r\v\f')
+
+
+def _escape_option(value: str) -> str:
+    """Экранирует значение для параметра options строки подключения libpq"""
+    return ''.join('\\' + ch if ch in _OPTION_SPECIAL_CHARS else ch for ch in value)
 
 
 class DatabaseConnection:
-    """Класс для управления соединениями с БД"""
+    """Класс для управления соединениями с БД (через пул соединений)"""
 
-    def __init__(self, logger):
+    def __init__(self, logger, max_workers: int = 1):
         self.logger = logger
+        self.min_connections = DB_POOL_MIN
+        # Не меньше двух соединений на поток: process_qso_batch держит одно, а
+        # check_table_structure берет второе. Пул при нехватке не ждет, а падает с PoolError
+        self.max_connections = max(DB_POOL_MAX or 10, max_workers * 2, self.min_connections)
+        self._pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> psycopg2.pool.ThreadedConnectionPool:
+        """Создает пул соединений при первом обращении"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self.logger.debug(f"Подключение к БД: {DB_HOST}:{DB_PORT}/{DB_NAME}")
+                    # Схема задается в стартовом пакете соединения, без отдельного SET.
+                    # Если DB_SCHEMA не задана - остается search_path сервера
+                    options = {}
+                    if DB_SCHEMA:
+                        options['options'] = f'-c search_path={_escape_option(DB_SCHEMA)}'
+                    self._pool = psycopg2.pool.ThreadedConnectionPool(
+                        minconn=self.min_connections,
+                        maxconn=self.max_connections,
+                        host=DB_HOST,
+                        port=DB_PORT,
+                        database=DB_NAME,
+                        user=DB_USER,
+                        password=DB_PASSWORD,
+                        **options
+                    )
+                    self.logger.debug(f"✅ Пул соединений с БД создан (до {self.max_connections} соединений)")
+        return self._pool
 
     def get_connection(self) -> Optional[psycopg2.extensions.connection]:
-        """Создает соединение с базой данных"""
+        """Берет соединение из пула. Вернуть его нужно через release_connection()"""
         try:
-            self.logger.debug(f"Подключение к БД: {DB_HOST}:{DB_PORT}/{DB_NAME}")
-
-            conn = psycopg2.connect(
-                host=DB_HOST,
-                port=DB_PORT,
-                database=DB_NAME,
-                user=DB_USER,
-                password=DB_PASSWORD
-            )
+            pool = self._get_pool()
+            conn = pool.getconn()
 
-            # Устанавливаем схему
-            with conn.cursor() as cur:
-                cur.execute(f"SET search_path TO {DB_SCHEMA}")
+            if conn.closed:
+                # Соединение в пуле закрыто - пересоздаем
+                pool.putconn(conn, close=True)
+                conn = pool.getconn()
 
-            self.logger.debug("✅ Подключение к БД успешно")
             return conn
 
         except psycopg2.OperationalError as e:
             self.logger.error(f"❌ Ошибка подключения к БД: {e}")
             return None
+        except psycopg2.pool.PoolError as e:
+            self.logger.error(f"❌ Нет свободных соединений в пуле БД: {e}")
+            return None
         except Exception as e:
             self.logger.error(f"❌ Неожиданная ошибка при подключении к БД: {e}")
             return None
 
+    def release_connection(self, conn):
+        """Возвращает соединение в пул (незавершенная транзакция откатывается)"""
+        if conn is None or self._pool is None:
+            return
+        try:
+            self._pool.putconn(conn, close=bool(conn.closed))
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка возврата соединения в пул: {e}")
+
+    def close_all(self):
+        """Закрывает все соединения пула"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+
     def get_cursor(self, conn, cursor_factory=RealDictCursor):
         """Получает курсор с указанной фабрикой"""
-        return conn.cursor(cursor_factory=cursor_factory)
\ No newline at end of file
+        return conn.cursor(cursor_factory=cursor_factory)
@@ -2,31 +2,235 @@
 Операции с базой данных
 """
 
+import io
+import csv
 import uuid
+import weakref
+import logging
 import psycopg2
-from typing import Dict, Any, Optional, List, Union
-from datetime import datetime, timedelta, timezone
-from psycopg2.extras import RealDictCursor
+from typing import Dict, Any, Optional, List, Tuple, Union, Iterable
+from datetime import datetime, timezone
+from psycopg2.extras import RealDictCursor, execute_values
 
+from config import DB_SYNCHRONOUS_COMMIT
 from database.connection import DatabaseConnection
 from lotw.normalizer import DataNormalizer
 
 
+# Запросы одиночных операций: готовятся на сервере (PREPARE) один раз на соединение
+# пула и дальше выполняются через EXECUTE без повторного разбора и планирования
+_PREPARED_STATEMENTS = {
+    # Точное совпадение (время в пределах $5..$6), а если его нет - ближайшая
+    # по времени QSO за тот же день; is_exact показывает, какая ветка сработала
+    'qso_find': """
+        WITH exact AS (
+            SELECT id, callsign, my_callsign, date, time, band, mode
+            FROM tlog_qso
+            WHERE user_id = $1
+            AND my_callsign = $2
+            AND callsign = $3
+            AND date = $4
+            AND time >= $5
+            AND time <= $6
+            AND band = $7
+            AND mode = $8
+            LIMIT 1
+        )
+        SELECT *, TRUE AS is_exact FROM exact
+        UNION ALL
+        (
+            SELECT id, callsign, my_callsign, date, time, band, mode, FALSE AS is_exact
+            FROM tlog_qso
+            WHERE NOT EXISTS (SELECT 1 FROM exact)
+            AND user_id = $1
+            AND my_callsign = $2
+            AND callsign = $3
+            AND date = $4
+            AND band = $7
+            AND mode = $8
+            ORDER BY ABS(EXTRACT(EPOCH FROM (time - $9::time))) ASC
+            LIMIT 1
+        )
+    """,
+    'qso_insert': """
+        INSERT INTO tlog_qso (
+            id, callsign, my_callsign, band, frequency, mode,
+            date, time, prop_mode, sat_name, lotw, paper_qsl, r150s,
+            gridsquare, my_gridsquare, vucc_grids, iota, app_lotw_rxqsl, rst_sent, rst_rcvd,
+            state, cqz, ituz, user_id, continent, dxcc, adif_upload_id,
+            created_at, updated_at
+        ) VALUES ($1::uuid, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13,
+                  $14, $15, $16, $17, $18, $19, $20, $21, $22, $23, $24, $25, $26, $27, NOW(), NOW())
+    """,
+    'qso_update': """
+        UPDATE tlog_qso SET
+            band = $1,
+            frequency = $2,
+            mode = $3,
+            prop_mode = $4,
+            sat_name = $5,
+            lotw = $6,
+            r150s = $7,
+            gridsquare = $8,
+            my_gridsquare = $9,
+            vucc_grids = $10,
+            iota = $11,
+            app_lotw_rxqsl = $12,
+            rst_sent = $13,
+            rst_rcvd = $14,
+            state = $15,
+            cqz = $16,
+            ituz = $17,
+            continent = $18,
+            dxcc = $19,
+            updated_at = NOW()
+        WHERE id = $20::uuid
+    """,
+    'profile_lastsync': """
+        UPDATE tlog_radioprofile
+        SET lotw_lastsync = $1
+        WHERE user_id = $2
+    """,
+}
+
+# Шаблон строки для _batch_insert: 26 параметров, id генерирует сервер,
+# created_at и updated_at - NOW()
+_BATCH_INSERT_TEMPLATE = (
+    "(gen_random_uuid(), %s, %s, %s, %s, %s, %s::date, %s::time, %s, %s, %s, %s, %s, %s,"
+    " %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())"
+)
+# Строк в одном INSERT; больший пакет execute_values делит на несколько запросов
+_BATCH_INSERT_PAGE_SIZE = 500
+
+# Начиная с этого размера пакета _batch_insert загружает строки через COPY: CSV пишется
+# в C, а execute_values формирует каждую строку в Python. Меньшие пакеты - обычная
+# инкрементальная синхронизация - обходятся без временной таблицы
+_BATCH_COPY_THRESHOLD = 100
+
+# process_qso_batch нормализует и обрабатывает входные QSO порциями такого размера,
+# чтобы не держать в памяти нормализованную копию всего пакета
+_PROCESS_CHUNK_SIZE = 10000
+
+# Начиная с этого размера пакета _find_existing_batch передает ключи поиска
+# через временную таблицу, а не списком VALUES в тексте запроса
+_FIND_PROBE_THRESHOLD = 500
+
+# Колонки строки _batch_insert в порядке параметров (без id, created_at и updated_at)
+_BATCH_INSERT_COLUMNS = (
+    'callsign, my_callsign, band, frequency, mode, '
+    'date, time, prop_mode, sat_name, lotw, paper_qsl, r150s, '
+    'gridsquare, my_gridsquare, vucc_grids, iota, app_lotw_rxqsl, rst_sent, rst_rcvd, '
+    'state, cqz, ituz, user_id, continent, dxcc, adif_upload_id'
+)
+
+# Поля, которые _batch_update переносит из LoTW в существующую QSO
+_BATCH_UPDATE_COLUMNS = (
+    'id', 'frequency', 'mode', 'lotw', 'gridsquare', 'my_gridsquare', 'vucc_grids',
+    'iota', 'app_lotw_rxqsl', 'cqz', 'ituz', 'prop_mode', 'sat_name', 'dxcc',
+    'r150s', 'state', 'continent'
+)
+
+# Первая строка VALUES - типизированные NULL из самой таблицы: так колонки VALUES
+# получают типы tlog_qso, даже если в пакете колонка целиком NULL.
+# У этой строки id NULL, поэтому в UPDATE она не участвует
+_BATCH_UPDATE_QUERY = f"""
+    UPDATE tlog_qso AS t SET
+        frequency = v.frequency,
+        mode = v.mode,
+        lotw = v.lotw,
+        gridsquare = v.gridsquare,
+        my_gridsquare = v.my_gridsquare,
+        vucc_grids = v.vucc_grids,
+        iota = v.iota,
+        app_lotw_rxqsl = v.app_lotw_rxqsl,
+        cqz = v.cqz,
+        ituz = v.ituz,
+        prop_mode = v.prop_mode,
+        sat_name = v.sat_name,
+        dxcc = v.dxcc,
+        r150s = COALESCE(v.r150s, t.r150s),
+        state = v.state,
+        continent = COALESCE(v.continent, t.continent),
+        updated_at = NOW()
+    FROM (VALUES
+        ({', '.join(f'(NULL::tlog_qso).{column}' for column in _BATCH_UPDATE_COLUMNS)}),
+        %s
+    ) AS v({', '.join(_BATCH_UPDATE_COLUMNS)})
+    WHERE t.id = v.id
+"""
+
+
+def _format_day_seconds(seconds: int) -> str:
+    """Форматирует секунды от начала суток в HH:MM:SS (значение ограничивается пределами суток)"""
+    seconds = min(max(seconds, 0), 86399)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _minute_seconds(value) -> Optional[int]:
+    """Секунды от начала суток для HH:MM (секунды времени не учитываются), None при ошибке формата"""
+    try:
+        h, m = map(int, str(value)[:5].split(':'))
+    except (TypeError, ValueError):
+        return None
+    return h * 3600 + m * 60
+
+
+def _copy_to_temp_table(cur, table: str, columns: str, rows):
+    """
+    Создает временную таблицу с колонками tlog_qso (типы те же, ограничений нет),
+    которая удаляется при завершении транзакции, и загружает в нее строки через COPY
+    """
+    # Таблица от предыдущей порции той же транзакции еще существует
+    cur.execute(f"DROP TABLE IF EXISTS pg_temp.{table}")
+    cur.execute(f"CREATE TEMP TABLE {table} ON COMMIT DROP AS SELECT {columns} FROM tlog_qso WITH NO DATA")
+
+    # NULL передаем как \N, чтобы пустые строки оставались пустыми строками
+    buf = io.StringIO()
+    csv.writer(buf).writerows(
+        ['\\N' if value is None else value for value in row] for row in rows
+    )
+    buf.seek(0)
+    cur.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buf)
+
+
 class DatabaseOperations:
     """Класс для операций с базой данных"""
 
-    def __init__(self, logger):
+    def __init__(self, logger, max_workers: int = 1):
         self.logger = logger
-        self.db_conn = DatabaseConnection(logger)
+        self.db_conn = DatabaseConnection(logger, max_workers=max_workers)
         self.normalizer = DataNormalizer(logger)
+        # Структура tlog_qso проверяется один раз, а не на каждый пакет
+        self._table_structure_ok = False
+        # Имена подготовленных запросов для каждого соединения пула
+        self._prepared = weakref.WeakKeyDictionary()
+        # username -> user_id из auth_user (кэшируются только найденные пользователи)
+        self._user_id_cache: Dict[str, int] = {}
         # Инициализируем функции lookup для DXCC и R150
         from r150s_lookup import get_dxcc_info as get_r150_info
         from cty_lookup import get_dxcc_from_cty
         self._get_r150_info = get_r150_info
         self._get_dxcc_from_cty = get_dxcc_from_cty
 
+    def close(self):
+        """Закрывает пул соединений с БД"""
+        self.db_conn.close_all()
+
+    def _execute_prepared(self, cur, name: str, params):
+        """Выполняет запрос из _PREPARED_STATEMENTS, при первом использовании на соединении готовит его"""
+        prepared = self._prepared.setdefault(cur.connection, set())
+        if name not in prepared:
+            # PREPARE живет до закрытия соединения и не отменяется rollback
+            cur.execute(f"PREPARE {name} AS {_PREPARED_STATEMENTS[name]}")
+            prepared.add(name)
+        cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+
     def get_user_id_by_username(self, username: str) -> Optional[int]:
         """Ищет user_id по username в таблице auth_user"""
+        user_id = self._user_id_cache.get(username)
+        if user_id is not None:
+            return user_id
+
         conn = self.db_conn.get_connection()
         if not conn:
             return None
@@ -39,6 +243,7 @@ class DatabaseOperations:
 
                 if result:
                     self.logger.debug(f"Найден user_id={result[0]} для username={username}")
+                    self._user_id_cache[username] = result[0]
                     return result[0]
                 else:
                     self.logger.warning(f"⚠️ Не найден user_id для username={username}")
@@ -47,7 +252,7 @@ class DatabaseOperations:
             self.logger.error(f"❌ Ошибка при поиске user_id: {e}")
             return None
         finally:
-            conn.close()
+            self.db_conn.release_connection(conn)
 
     def find_existing_qso(self, qso_data: Dict[str, str], user_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -60,7 +265,7 @@ class DatabaseOperations:
         band = self.normalizer.normalize_band(qso_data.get('BAND', ''))
         mode = self.normalizer.get_mode(qso_data)
 
-        if not all([callsign, my_callsign, date_str, time_str, band, mode]):
+        if not (callsign and my_callsign and date_str and time_str and band and mode):
             self.logger.debug(f"⚠️ Недостаточно данных для поиска QSO")
             return None
 
@@ -69,66 +274,36 @@ class DatabaseOperations:
             return None
 
         try:
-            qso_time = datetime.strptime(time_str, '%H:%M:%S').time()
+            # Время уже нормализовано в HH:MM:SS - считаем в секундах от начала суток
+            hours, minutes, seconds = map(int, time_str.split(':'))
+            if not (0 <= hours < 24 and 0 <= minutes < 60 and 0 <= seconds < 60):
+                raise ValueError(f"некорректное время {time_str}")
+            qso_seconds = hours * 3600 + minutes * 60 + seconds
 
-            # Верхняя и нижняя границы времени
-            time_lower = (datetime.combine(datetime.today(), qso_time) - timedelta(minutes=10)).time()
-            time_upper = (datetime.combine(datetime.today(), qso_time) + timedelta(minutes=10)).time()
+            # Верхняя и нижняя границы времени (±10 минут). Дата в запросе фиксирована,
+            # поэтому у полуночи окно обрезается, а не переходит на другой конец суток
+            time_lower = _format_day_seconds(qso_seconds - 600)
+            time_upper = _format_day_seconds(qso_seconds + 600)
 
             with self.db_conn.get_cursor(conn) as cur:
-                # Поиск по точному совпадению
-                query = """
-                    SELECT id, callsign, my_callsign, date, time, band, mode
-                    FROM tlog_qso
-                    WHERE user_id = %s
-                    AND my_callsign = %s
-                    AND callsign = %s
-                    AND date = %s
-                    AND time >= %s
-                    AND time <= %s
-                    AND band = %s
-                    AND mode = %s
-                """
-
+                # Поиск по точному совпадению и расширенный поиск - одним запросом
                 params = [
                     user_id, my_callsign, callsign, date_str,
-                    time_lower.strftime('%H:%M:%S'), time_upper.strftime('%H:%M:%S'),
-                    band, mode
+                    time_lower, time_upper,
+                    band, mode, time_str
                 ]
 
-                cur.execute(query, params)
+                self._execute_prepared(cur, 'qso_find', params)
                 result = cur.fetchone()
 
-                if result:
-                    self.logger.debug(f"✅ Найдена существующая QSO: ID={result['id']}")
-                    return result
-
-                # Расширенный поиск
-                query2 = """
-                    SELECT id, callsign, my_callsign, date, time, band, mode
-                    FROM tlog_qso
-                    WHERE user_id = %s
-                    AND my_callsign = %s
-                    AND callsign = %s
-                    AND date = %s
-                    AND band = %s
-                    AND mode = %s
-                    ORDER BY ABS(EXTRACT(EPOCH FROM (time - %s::time))) ASC
-                    LIMIT 1
-                """
-
-                params2 = [
-                    user_id, my_callsign, callsign, date_str, band, mode, time_str
-                ]
-
-                cur.execute(query2, params2)
-                result2 = cur.fetchone()
-
-                if result2:
-                    self.logger.debug(f"✅ Найдена близкая QSO: ID={result2['id']}")
-                    return result2
+                if not result:
+                    return None
 
-                return None
+                if result.pop('is_exact'):
+                    self.logger.debug(f"✅ Найдена существующая QSO: ID={result['id']}")
+                else:
+                    self.logger.debug(f"✅ Найдена близкая QSO: ID={result['id']}")
+                return result
 
         except Exception as e:
             self.logger.error(f"❌ Ошибка при поиске QSO: {e}")
@@ -136,7 +311,7 @@ class DatabaseOperations:
             self.logger.debug(f"🔍 Детали ошибки:\n{traceback.format_exc()}")
             return None
         finally:
-            conn.close()
+            self.db_conn.release_connection(conn)
 
     def insert_qso(self, qso_data: Dict[str, str], my_callsign: str, user_id: int) -> bool:
         """Вставляет новую QSO в базу данных с UUID"""
@@ -155,17 +330,6 @@ class DatabaseOperations:
             self.logger.debug(f"📝 UUID: {record_id}")
 
             with conn.cursor() as cur:
-                query = """
-                    INSERT INTO tlog_qso (
-                        id, callsign, my_callsign, band, frequency, mode,
-                        date, time, prop_mode, sat_name, lotw, paper_qsl, r150s,
-                        gridsquare, my_gridsquare, vucc_grids, iota, app_lotw_rxqsl, rst_sent, rst_rcvd,
-                        state, cqz, ituz, user_id, continent, dxcc, adif_upload_id,
-                        created_at, updated_at
-                    ) VALUES (%s::uuid, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                              %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
-                """
-
                 params = [
                     record_id,
                     callsign, my_callsign,
@@ -181,7 +345,7 @@ class DatabaseOperations:
                     user_id, normalized_data['continent'], normalized_data['dxcc'], None
                 ]
 
-                cur.execute(query, params)
+                self._execute_prepared(cur, 'qso_insert', params)
                 conn.commit()
 
                 self.logger.debug(f"✅ Добавлена новая QSO: {callsign} (UUID: {record_id})")
@@ -196,7 +360,7 @@ class DatabaseOperations:
             self.logger.error(f"❌ Ошибка при добавлении QSO: {e}")
             return False
         finally:
-            conn.close()
+            self.db_conn.release_connection(conn)
 
     def update_qso(self, qso_id: str, qso_data: Dict[str, str]) -> bool:
         """Обновляет существующую QSO в базе данных"""
@@ -209,31 +373,6 @@ class DatabaseOperations:
             normalized_data = self.normalizer.prepare_qso_data(qso_data)
 
             with conn.cursor() as cur:
-                query = """
-                    UPDATE tlog_qso SET
-                        band = %s,
-                        frequency = %s,
-                        mode = %s,
-                        prop_mode = %s,
-                        sat_name = %s,
-                        lotw = %s,
-                        r150s = %s,
-                        gridsquare = %s,
-                        my_gridsquare = %s,
-                        vucc_grids = %s,
-                        iota = %s,
-                        app_lotw_rxqsl = %s,
-                        rst_sent = %s,
-                        rst_rcvd = %s,
-                        state = %s,
-                        cqz = %s,
-                        ituz = %s,
-                        continent = %s,
-                        dxcc = %s,
-                        updated_at = NOW()
-                    WHERE id = %s::uuid
-                """
-
                 params = [
                     normalized_data['band'], normalized_data['frequency'], normalized_data['mode'],
                     normalized_data['prop_mode'], normalized_data['sat_name'], normalized_data['lotw'],
@@ -245,7 +384,7 @@ class DatabaseOperations:
                     normalized_data['dxcc'], qso_id
                 ]
 
-                cur.execute(query, params)
+                self._execute_prepared(cur, 'qso_update', params)
                 conn.commit()
 
                 self.logger.debug(f"✅ Обновлена QSO ID={qso_id}")
@@ -256,10 +395,15 @@ class DatabaseOperations:
             self.logger.error(f"❌ Ошибка при обновлении QSO ID={qso_id}: {e}")
             return False
         finally:
-            conn.close()
+            self.db_conn.release_connection(conn)
 
-    def process_qso_batch(self, qso_data_list: List[Dict[str, str]], my_callsign: str, user_id: int) -> Dict[str, Any]:
-        """Обрабатывает пакет QSO с batch-запросами"""
+    def process_qso_batch(self, qso_data_list: Iterable[Dict[str, str]], my_callsign: str, user_id: int) -> Dict[str, Any]:
+        """
+        Обрабатывает пакет QSO с batch-запросами.
+
+        Входные QSO читаются один раз и обрабатываются порциями по _PROCESS_CHUNK_SIZE,
+        поэтому вместо списка можно передать генератор. Все порции - одна транзакция.
+        """
         conn = self.db_conn.get_connection()
         if not conn:
             return {
@@ -268,140 +412,223 @@ class DatabaseOperations:
             }
 
         try:
-            self.logger.debug(f"🔄 Обработка {len(qso_data_list)} QSO (user_id={user_id})")
+            self.logger.debug(f"🔄 Обработка QSO (user_id={user_id})")
 
             # Проверяем структуру таблицы
-            self.logger.debug("🔍 Проверяем структуру таблицы...")
-            if not self.check_table_structure():
-                return {
-                    'success': False,
-                    'error': 'Неправильная структура таблицы tlog_qso',
-                    'message': 'Колонка app_lotw_rxqsl не найдена'
-                }
+            if not self._table_structure_ok:
+                self.logger.debug("🔍 Проверяем структуру таблицы...")
+                if not self.check_table_structure():
+                    return {
+                        'success': False,
+                        'error': 'Неправильная структура таблицы tlog_qso',
+                        'message': 'Колонка app_lotw_rxqsl не найдена'
+                    }
+                self._table_structure_ok = True
+
+            # Настройка действует только в транзакции этого пакета
+            with conn.cursor() as cur:
+                cur.execute("SET LOCAL synchronous_commit = %s", (DB_SYNCHRONOUS_COMMIT,))
 
-            # Нормализуем все данные заранее
+            # Нормализуем данные порциями и сразу передаем их в БД
             normalized_list = []
+            total = 0
+            normalized_total = 0
             skipped = 0
+            added = 0
+            updated = 0
+            failed = 0
+
+            self.logger.debug("🔍 Нормализация: начинаем обработку сырых данных")
 
-            self.logger.debug(f"🔍 Нормализация: начинаем обработку {len(qso_data_list)} сырых данных")
+            # Построчные отладочные сообщения форматируем только при DEBUG
+            debug = self.logger.isEnabledFor(logging.DEBUG)
 
             for i, qso_data in enumerate(qso_data_list):
-                self.logger.debug(f"🔍 Нормализация QSO #{i+1}: CALL={qso_data.get('CALL')}, BAND={qso_data.get('BAND')}")
+                total += 1
+                if debug:
+                    self.logger.debug(f"🔍 Нормализация QSO #{i+1}: CALL={qso_data.get('CALL')}, BAND={qso_data.get('BAND')}")
 
                 # Проверка обязательных полей
-                required_fields = ['CALL', 'QSO_DATE', 'TIME_ON', 'BAND']
-                missing_fields = [field for field in required_fields if not qso_data.get(field)]
-
-                if missing_fields:
+                if not (qso_data.get('CALL') and qso_data.get('QSO_DATE') and
+                        qso_data.get('TIME_ON') and qso_data.get('BAND')):
+                    missing_fields = [field for field in ('CALL', 'QSO_DATE', 'TIME_ON', 'BAND') if not qso_data.get(field)]
                     self.logger.debug(f"🔍 Нормализация QSO #{i+1}: пропущен, отсутствуют поля: {missing_fields}")
                     skipped += 1
                     continue
 
                 try:
                     normalized = self.normalizer.prepare_qso_data(qso_data, my_callsign)
-                    self.logger.debug(f"🔍 Нормализация QSO #{i+1}: успешно нормализован")
-                    self.logger.debug(f"🔍 Нормализация QSO #{i+1}: app_lotw_rxqsl={normalized.get('app_lotw_rxqsl')} (тип: {type(normalized.get('app_lotw_rxqsl'))})")
+                    # Ключ сопоставления и время в секундах считаем один раз на запись,
+                    # а не в каждом сравнении с существующими QSO
+                    normalized['_key'] = (normalized['callsign'], normalized['date'],
+                                          normalized['band'], normalized['mode'])
+                    normalized['_seconds'] = _minute_seconds(normalized['time'])
+                    if debug:
+                        self.logger.debug(f"🔍 Нормализация QSO #{i+1}: успешно нормализован")
+                        self.logger.debug(f"🔍 Нормализация QSO #{i+1}: app_lotw_rxqsl={normalized.get('app_lotw_rxqsl')} (тип: {type(normalized.get('app_lotw_rxqsl'))})")
                     normalized_list.append(normalized)
                 except Exception as e:
                     self.logger.error(f"❌ Нормализация QSO #{i+1}: ошибка - {e}")
                     skipped += 1
                     continue
 
-            self.logger.info(f"🔍 Нормализация: завершено. Добавлено {len(normalized_list)}, пропущено {skipped}")
-
-            if not normalized_list:
+                if len(normalized_list) >= _PROCESS_CHUNK_SIZE:
+                    chunk_added, chunk_updated, chunk_failed = self._process_normalized_chunk(normalized_list, user_id, conn)
+                    normalized_total += len(normalized_list)
+                    added += chunk_added
+                    updated += chunk_updated
+                    failed += chunk_failed
+                    normalized_list = []
+
+            if normalized_list:
+                chunk_added, chunk_updated, chunk_failed = self._process_normalized_chunk(normalized_list, user_id, conn)
+                normalized_total += len(normalized_list)
+                added += chunk_added
+                updated += chunk_updated
+                failed += chunk_failed
+                normalized_list = []
+
+            self.logger.info(f"🔍 Нормализация: завершено. Добавлено {normalized_total}, пропущено {skipped}")
+
+            if not normalized_total:
                 return {
                     'success': True,
                     'user_id': user_id,
                     'my_callsign': my_callsign,
-                    'total_qso': len(qso_data_list),
+                    'total_qso': total,
                     'qso_added': 0,
                     'qso_updated': 0,
                     'qso_skipped': skipped,
                     'message': 'Нет данных для обработки'
                 }
 
-            # Batch поиск существующих QSO
-            existing_qsos = self._find_existing_batch(normalized_list, user_id, conn)
+            # Поиск, вставка и обновление - одна транзакция с одним коммитом
+            conn.commit()
+
+            if failed:
+                # Сохраненные порции остаются, но задача считается неуспешной: она будет
+                # повторена, а lotw_lastsync не сдвинется и несохраненные QSO не потеряются
+                self.logger.error(f"❌ Обработка завершена с ошибками: не сохранено {failed} QSO (добавлено {added}, обновлено {updated})")
+                return {
+                    'success': False,
+                    'user_id': user_id,
+                    'my_callsign': my_callsign,
+                    'total_qso': total,
+                    'qso_added': added,
+                    'qso_updated': updated,
+                    'qso_skipped': skipped,
+                    'qso_failed': failed,
+                    'error': f'Не удалось сохранить {failed} QSO',
+                    'message': 'Ошибка при сохранении части QSO'
+                }
+
+            self.logger.info(f"✅ Обработка завершена: добавлено {added}, обновлено {updated}")
+
+            return {
+                'success': True,
+                'user_id': user_id,
+                'my_callsign': my_callsign,
+                'total_qso': total,
+                'qso_added': added,
+                'qso_updated': updated,
+                'qso_skipped': skipped,
+                'message': f'Обработано {total} QSO'
+            }
+
+        except Exception as e:
+            self.logger.error(f"❌ Критическая ошибка при обработке данных: {e}")
+            import traceback
+            self.logger.error(f"❌ Stack trace: {traceback.format_exc()}")
+            return {
+                'success': False,
+                'error': str(e),
+                'message': 'Критическая ошибка при обработке данных'
+            }
+        finally:
+            self.db_conn.release_connection(conn)
 
-            # Создаем множество ключей существующих записей для исключения из insert
-            existing_keys = set()
-            for q in existing_qsos:
-                key = (q['callsign'], str(q['date']), q['band'], q['mode'], str(q['time'])[:5])
-                existing_keys.add(key)
+    def _process_normalized_chunk(self, normalized_list: List[Dict], user_id: int, conn) -> Tuple[int, int, int]:
+        """
+        Ищет существующие QSO для порции, вставляет новые и обновляет найденные (без коммита).
+        Возвращает (добавлено, обновлено, не сохранено из-за ошибки)
+        """
+        # Batch поиск существующих QSO
+        existing_index = self._find_existing_batch(normalized_list, user_id, conn)
+        if existing_index is None:
+            # Без результатов поиска нельзя отличить новые QSO от существующих -
+            # порцию не сохраняем, а не вставляем ее целиком как новую
+            return 0, 0, len(normalized_list)
+        failed = 0
+
+        # Разделяем на новые и существующие на основе app_lotw_rxqsl
+        new_qsos = []
+        update_qsos = []
 
-            # Разделяем на новые и существующие на основе app_lotw_rxqsl
-            new_qsos = []
-            update_qsos = []
+        self.logger.info(f"🔍 Найдено {sum(len(found) for found in existing_index.values())} существующих QSO в БД")
+        self.logger.info(f"🔍 Обрабатываем {len(normalized_list)} нормализованных QSO")
 
-            self.logger.info(f"🔍 Найдено {len(existing_qsos)} существующих QSO в БД")
-            self.logger.info(f"🔍 Обрабатываем {len(normalized_list)} нормализованных QSO")
+        debug = self.logger.isEnabledFor(logging.DEBUG)
 
-            for i, q in enumerate(normalized_list):
+        for i, q in enumerate(normalized_list):
+            if debug:
                 self.logger.debug(f"🔍 QSO #{i+1}: {q['callsign']} {q['date']} {q['time']} {q['band']} {q['mode']}")
 
-                # Ищем соответствующий существующий QSO
-                matching_existing = None
-                for j, ex in enumerate(existing_qsos):
-                    if (q['callsign'] == ex['callsign'] and
-                        str(q['date']) == str(ex['date']) and
-                        q['band'] == ex['band'] and
-                        q['mode'] == ex['mode']):
-                        # Проверяем время с погрешностью ±5 минут (300 секунд)
-                        try:
-                            new_time = q['time'][:5]
-                            h, m = map(int, new_time.split(':'))
-                            new_seconds = h * 3600 + m * 60
-
-                            ex_time = str(ex['time'])[:5]
-                            h, m = map(int, ex_time.split(':'))
-                            existing_seconds = h * 3600 + m * 60
-
-                            time_diff = abs(new_seconds - existing_seconds)
-                            self.logger.debug(f"🔍 Время сравнения: new={new_time}({new_seconds}s), existing={ex_time}({existing_seconds}s), diff={time_diff}s")
-
-                            if time_diff <= 300:  # 5 минут = 300 секунд
-                                matching_existing = ex
-                                self.logger.debug(f"🔍 Найдено совпадение с существующим QSO #{j+1}")
-                                break
-                        except Exception as e:
-                            self.logger.error(f"❌ Ошибка при сравнении времени: {e}")
-                            continue
-
-                if matching_existing:
-                    # Проверяем, нужно ли обновлять на основе app_lotw_rxqsl
-                    should_update = self._should_update_qso(q, matching_existing)
-                    if should_update:
-                        update_qsos.append(q)
+            # Ищем соответствующий существующий QSO
+            matching_existing = None
+            new_seconds = q['_seconds']
+            for j, (ex_id, ex_time, existing_seconds, ex_rxqsl) in enumerate(existing_index.get(q['_key'], ())):
+                # Проверяем время с погрешностью ±5 минут (300 секунд)
+                if new_seconds is None or existing_seconds is None:
+                    self.logger.error(f"❌ Ошибка при сравнении времени: new={q['time']}, existing={ex_time}")
+                    continue
+
+                time_diff = abs(new_seconds - existing_seconds)
+                if debug:
+                    self.logger.debug(f"🔍 Время сравнения: new={q['time'][:5]}({new_seconds}s), existing={ex_time[:5]}({existing_seconds}s), diff={time_diff}s")
+
+                if time_diff <= 300:  # 5 минут = 300 секунд
+                    matching_existing = (ex_id, ex_rxqsl)
+                    if debug:
+                        self.logger.debug(f"🔍 Найдено совпадение с существующим QSO #{j+1}")
+                    break
+
+            if matching_existing:
+                ex_id, ex_rxqsl = matching_existing
+                # Проверяем, нужно ли обновлять на основе app_lotw_rxqsl
+                should_update = self._should_update_qso(q, ex_rxqsl)
+                if should_update:
+                    update_qsos.append((q, ex_id))
+                    if debug:
                         self.logger.debug(f"🔍 QSO #{i+1} будет обновлено (app_lotw_rxqsl новее)")
-                    else:
-                        self.logger.debug(f"🔍 QSO #{i+1} пропущено (app_lotw_rxqsl не новее)")
-                else:
-                    new_qsos.append(q)
-                    # Добавляем дополнительное логирование для отладки
-                    self.logger.debug(f"✅ QSO #{i+1} {q['callsign']} {q['date']} {q['time']} {q['band']} {q['mode']} добавлено как НОВОЕ")
-
-                    # Логируем детали для IC8TEM или первых нескольких QSO
-                    if q['callsign'] == 'IC8TEM' or i < 3:
-                        self.logger.debug(f"🔍 Детали нового QSO {q['callsign']}:")
-                        self.logger.debug(f"   - callsign: {q['callsign']}")
-                        self.logger.debug(f"   - my_callsign: {q['my_callsign']}")
-                        self.logger.debug(f"   - date: {q['date']} (тип: {type(q['date'])})")
-                        self.logger.debug(f"   - time: {q['time']} (тип: {type(q['time'])})")
-                        self.logger.debug(f"   - band: {q['band']}")
-                        self.logger.debug(f"   - mode: {q['mode']}")
-                        self.logger.debug(f"   - app_lotw_rxqsl: {q.get('app_lotw_rxqsl')}")
-
-            self.logger.info(f"🔍 Итого: {len(new_qsos)} новых QSO, {len(update_qsos)} для обновления")
+                elif debug:
+                    self.logger.debug(f"🔍 QSO #{i+1} пропущено (app_lotw_rxqsl не новее)")
+            else:
+                new_qsos.append(q)
+                if not debug:
+                    continue
 
-            added = 0
-            updated = 0
+                # Добавляем дополнительное логирование для отладки
+                self.logger.debug(f"✅ QSO #{i+1} {q['callsign']} {q['date']} {q['time']} {q['band']} {q['mode']} добавлено как НОВОЕ")
 
-            # Batch insert новых
-            if new_qsos:
-                self.logger.debug(f"🔍 Вызываем _batch_insert для {len(new_qsos)} новых QSO")
+                # Логируем детали для IC8TEM или первых нескольких QSO
+                if q['callsign'] == 'IC8TEM' or i < 3:
+                    self.logger.debug(f"🔍 Детали нового QSO {q['callsign']}:")
+                    self.logger.debug(f"   - callsign: {q['callsign']}")
+                    self.logger.debug(f"   - my_callsign: {q['my_callsign']}")
+                    self.logger.debug(f"   - date: {q['date']} (тип: {type(q['date'])})")
+                    self.logger.debug(f"   - time: {q['time']} (тип: {type(q['time'])})")
+                    self.logger.debug(f"   - band: {q['band']}")
+                    self.logger.debug(f"   - mode: {q['mode']}")
+                    self.logger.debug(f"   - app_lotw_rxqsl: {q.get('app_lotw_rxqsl')}")
 
-                # Создаем курсор для проверки дубликатов
+        self.logger.info(f"🔍 Итого: {len(new_qsos)} новых QSO, {len(update_qsos)} для обновления")
+
+        # Batch insert новых
+        if new_qsos:
+            self.logger.debug(f"🔍 Вызываем _batch_insert для {len(new_qsos)} новых QSO")
+
+            # Отладочные запросы в БД выполняем только при DEBUG - это лишние обращения на каждый пакет
+            if self.logger.isEnabledFor(logging.DEBUG):
                 with conn.cursor() as cur:
                     # Проверяем, нет ли уже таких QSO в базе данных
                     for q in new_qsos[:3]:  # Проверяем первые 3 для отладки
@@ -409,47 +636,30 @@ class DatabaseOperations:
                             SELECT COUNT(*) FROM tlog_qso
                             WHERE user_id = %s AND callsign = %s AND date = %s::date AND band = %s AND mode = %s
                         """
-                        cur.execute(check_query, (user_id, q['callsign'], str(q['date']), q['band'], q['mode']))
+                        cur.execute(check_query, (user_id, q['callsign'], q['date'], q['band'], q['mode']))
                         count = cur.fetchone()[0]
                         self.logger.debug(f"🔍 Проверка дубликатов для {q['callsign']} {q['date']} {q['band']} {q['mode']}: {count} найдено")
 
-                added = self._batch_insert(new_qsos, user_id, conn)
-            else:
+            added = self._batch_insert(new_qsos, user_id, conn)
+            if added is None:
                 added = 0
-                self.logger.info("🔍 Нет новых QSO для вставки")
+                failed += len(new_qsos)
+        else:
+            added = 0
+            self.logger.info("🔍 Нет новых QSO для вставки")
 
-            # Batch update существующих
-            if update_qsos:
-                self.logger.debug(f"🔍 Вызываем _batch_update для {len(update_qsos)} QSO для обновления")
-                updated = self._batch_update(update_qsos, existing_qsos, conn)
-            else:
+        # Batch update существующих
+        if update_qsos:
+            self.logger.debug(f"🔍 Вызываем _batch_update для {len(update_qsos)} QSO для обновления")
+            updated = self._batch_update(update_qsos, conn)
+            if updated is None:
                 updated = 0
-                self.logger.info("🔍 Нет QSO для обновления")
-
-            self.logger.info(f"✅ Обработка завершена: добавлено {added}, обновлено {updated}")
+                failed += len(update_qsos)
+        else:
+            updated = 0
+            self.logger.info("🔍 Нет QSO для обновления")
 
-            return {
-                'success': True,
-                'user_id': user_id,
-                'my_callsign': my_callsign,
-                'total_qso': len(qso_data_list),
-                'qso_added': added,
-                'qso_updated': updated,
-                'qso_skipped': skipped,
-                'message': f'Обработано {len(qso_data_list)} QSO'
-            }
-
-        except Exception as e:
-            self.logger.error(f"❌ Критическая ошибка при обработке данных: {e}")
-            import traceback
-            self.logger.error(f"❌ Stack trace: {traceback.format_exc()}")
-            return {
-                'success': False,
-                'error': str(e),
-                'message': 'Критическая ошибка при обработке данных'
-            }
-        finally:
-            conn.close()
+        return added, updated, failed
 
     def check_table_structure(self) -> bool:
         """Проверяет структуру таблицы tlog_qso"""
@@ -487,9 +697,9 @@ class DatabaseOperations:
             self.logger.error(f"❌ Ошибка проверки структуры таблицы: {e}")
             return False
         finally:
-            conn.close()
+            self.db_conn.release_connection(conn)
 
-    def _should_update_qso(self, new_q: Dict, existing_q: Dict) -> bool:
+    def _should_update_qso(self, new_q: Dict, existing_rxqsl: Optional[datetime]) -> bool:
         """
         Определяет, нужно ли обновлять существующий QSO на основе app_lotw_rxqsl.
 
@@ -499,14 +709,13 @@ class DatabaseOperations:
 
         Args:
             new_q: Новые данные QSO из LoTW
-            existing_q: Существующий QSO из базы данных
+            existing_rxqsl: app_lotw_rxqsl существующего QSO из базы данных
 
         Returns:
             bool: True если нужно обновить, False если пропустить
         """
         try:
             new_rxqsl = new_q.get('app_lotw_rxqsl')
-            existing_rxqsl = existing_q.get('app_lotw_rxqsl')
 
             # Если в базе данных NULL → обновляем
             if existing_rxqsl is None:
@@ -527,87 +736,94 @@ class DatabaseOperations:
             # В случае ошибки обновляем для безопасности
             return True
 
-    def _find_existing_batch(self, normalized_list: List[Dict], user_id: int, conn) -> List[Dict]:
-        """Batch поиск существующих QSO с погрешностью времени ±5 минут"""
+    def _find_existing_batch(self, normalized_list: List[Dict], user_id: int, conn) -> Optional[Dict[Tuple[str, str, str, str], List[tuple]]]:
+        """
+        Batch поиск существующих QSO по callsign, date, band, mode.
+
+        Возвращает индекс: ключ (callsign, date, band, mode) -> список кортежей
+        (id, time, время в секундах, app_lotw_rxqsl) или None при ошибке поиска.
+        Погрешность времени ±5 минут проверяет вызывающий код.
+        """
         if not normalized_list:
-            return []
+            return {}
 
         try:
             # Создаем курсор для операций поиска
             with conn.cursor() as cur:
-                # Формируем VALUES для поиска по callsign, date, band, mode (без time)
-                values = []
+                # Порции пакета идут в одной транзакции: при ошибке откатываем только
+                # поиск этой порции, а не результаты предыдущих
+                cur.execute("SAVEPOINT batch_find")
+
+                # Ищем по callsign, date, band, mode (без time)
                 params = [user_id]
-                for q in normalized_list:
-                    values.append("(%s, %s::date, %s, %s)")
-                    params.extend([q['callsign'], q['date'], q['band'], q['mode']])
+                if len(normalized_list) > _FIND_PROBE_THRESHOLD:
+                    # Большой пакет: ключи загружаем через COPY во временную таблицу,
+                    # а не раздуваем текст запроса списком VALUES
+                    _copy_to_temp_table(
+                        cur, 'tlog_qso_probe', 'callsign, date, band, mode',
+                        ((q['callsign'], q['date'], q['band'], q['mode']) for q in normalized_list)
+                    )
+                    # Статистика для планировщика: autovacuum временные таблицы не анализирует
+                    cur.execute("ANALYZE tlog_qso_probe")
+                    keys = "SELECT callsign, date, band, mode FROM tlog_qso_probe"
+                else:
+                    values = []
+                    for q in normalized_list:
+                        values.append("(%s, %s::date, %s, %s)")
+                        params.extend([q['callsign'], q['date'], q['band'], q['mode']])
+                    keys = f"VALUES {', '.join(values)}"
 
                 query = f"""
                     SELECT id, callsign, date::text, band, mode, time::text, app_lotw_rxqsl
                     FROM tlog_qso
                     WHERE user_id = %s
-                    AND (callsign, date, band, mode) IN (VALUES {', '.join(values)})
+                    AND (callsign, date, band, mode) IN ({keys})
                 """
 
                 cur.execute(query, params)
-                rows = cur.fetchall()
-
-                # Преобразуем результат в список словарей
-                existing_qsos = []
-                for row in rows:
-                    existing_qsos.append({
-                        'id': row[0],
-                        'callsign': row[1],
-                        'date': row[2],
-                        'band': row[3],
-                        'mode': row[4],
-                        'time': row[5],
-                        'app_lotw_rxqsl': row[6]
-                    })
-
-                # Фильтруем по времени с погрешностью ±5 минут (300 секунд)
-                filtered = []
-                for new_q in normalized_list:
-                    new_time_str = new_q['time'][:5]
-                    try:
-                        # Конвертируем время в секунды
-                        h, m = map(int, new_time_str.split(':'))
-                        new_seconds = h * 3600 + m * 60
-                    except Exception:
-                        continue
-
-                    for existing in existing_qsos:
-                        # Проверяем совпадение по основным полям
-                        if (new_q['callsign'] == existing['callsign'] and
-                            str(new_q['date']) == str(existing['date']) and
-                            new_q['band'] == existing['band'] and
-                            new_q['mode'] == existing['mode']):
-
-                            # Проверяем время с погрешностью ±5 минут
-                            try:
-                                ex_time = existing['time'][:5]
-                                h, m = map(int, ex_time.split(':'))
-                                existing_seconds = h * 3600 + m * 60
-                                time_diff = abs(new_seconds - existing_seconds)
-                                if time_diff <= 300:  # 5 минут = 300 секунд
-                                    filtered.append(existing)
-                                    break
-                            except Exception:
-                                continue
-
-                return filtered
+
+                # Индекс по ключу сопоставления прямо из строк курсора, без словаря на строку:
+                # каждой новой QSO достаются только записи с тем же ключом
+                existing_index = {}
+                for qso_id, callsign, date, band, mode, time, app_lotw_rxqsl in cur:
+                    existing_index.setdefault((callsign, date, band, mode), []).append(
+                        (qso_id, time, _minute_seconds(time), app_lotw_rxqsl)
+                    )
+
+                cur.execute("RELEASE SAVEPOINT batch_find")
+                return existing_index
 
         except Exception as e:
             self.logger.error(f"❌ Ошибка batch поиска: {e}")
-            return []
+            self._rollback_to_savepoint(conn, 'batch_find')
+            return None
 
-    def _batch_insert(self, normalized_list: List[Dict], user_id: int, conn) -> int:
-        """Batch вставка новых QSO с пропуском дубликатов"""
+    def _rollback_to_savepoint(self, conn, name: str):
+        """
+        Откатывает транзакцию пакета к точке сохранения порции. Ошибку отката
+        (например, при разрыве соединения) только логирует, чтобы не потерять исходную
+        """
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"ROLLBACK TO SAVEPOINT {name}")
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка отката к точке сохранения {name}: {e}")
+
+    def _batch_insert(self, normalized_list: List[Dict], user_id: int, conn) -> Optional[int]:
+        """
+        Batch вставка новых QSO с пропуском дубликатов (коммит выполняет вызывающий код).
+        Возвращает число добавленных QSO или None при ошибке вставки
+        """
         if not normalized_list:
             self.logger.debug("🔍 _batch_insert: пустой список QSO")
             return 0
 
         try:
+            # Порции пакета идут в одной транзакции: при ошибке откатываем только
+            # вставку этой порции, вставки и обновления предыдущих порций остаются
+            with conn.cursor() as cur:
+                cur.execute("SAVEPOINT batch_insert")
+
             self.logger.debug(f"🔍 _batch_insert: начинаем вставку {len(normalized_list)} QSO для user_id={user_id}")
 
             # Логируем первые несколько QSO для отладки
@@ -624,33 +840,35 @@ class DatabaseOperations:
             if len(normalized_list) > 3:
                 self.logger.debug(f"🔍 ... и еще {len(normalized_list) - 3} QSO")
 
+            debug = self.logger.isEnabledFor(logging.DEBUG)
+
             # Создаем курсор для операций
             with conn.cursor() as cur:
-                # ДИАГНОСТИКА: Проверяем уникальные ограничения для первых QSO
-                self.logger.debug("🔍 ДИАГНОСТИКА: проверяем уникальные ограничения...")
-                for i, q in enumerate(normalized_list[:3]):
-                    # Проверяем существование точно такого же QSO
-                    check_query = """
-                        SELECT id, callsign, date, band, mode, time
-                        FROM tlog_qso
-                        WHERE user_id = %s AND callsign = %s AND date = %s::date AND band = %s AND mode = %s
-                    """
-                    cur.execute(check_query, (user_id, q['callsign'], str(q['date']), q['band'], q['mode']))
-                    existing = cur.fetchall()
-
-                    if existing:
-                        self.logger.debug(f"🔍 QSO #{i+1} {q['callsign']} {q['date']} {q['band']} {q['mode']}: НАЙДЕН в БД")
-                        for ex in existing:
-                            self.logger.debug(f"   Существующий: {ex}")
-                    else:
-                        self.logger.debug(f"🔍 QSO #{i+1} {q['callsign']} {q['date']} {q['band']} {q['mode']}: НЕ НАЙДЕН в БД - будет добавлен")
+                # ДИАГНОСТИКА: Проверяем уникальные ограничения для первых QSO (только при DEBUG)
+                if debug:
+                    self.logger.debug("🔍 ДИАГНОСТИКА: проверяем уникальные ограничения...")
+                    for i, q in enumerate(normalized_list[:3]):
+                        # Проверяем существование точно такого же QSO
+                        check_query = """
+                            SELECT id, callsign, date, band, mode, time
+                            FROM tlog_qso
+                            WHERE user_id = %s AND callsign = %s AND date = %s::date AND band = %s AND mode = %s
+                        """
+                        cur.execute(check_query, (user_id, q['callsign'], q['date'], q['band'], q['mode']))
+                        existing = cur.fetchall()
+
+                        if existing:
+                            self.logger.debug(f"🔍 QSO #{i+1} {q['callsign']} {q['date']} {q['band']} {q['mode']}: НАЙДЕН в БД")
+                            for ex in existing:
+                                self.logger.debug(f"   Существующий: {ex}")
+                        else:
+                            self.logger.debug(f"🔍 QSO #{i+1} {q['callsign']} {q['date']} {q['band']} {q['mode']}: НЕ НАЙДЕН в БД - будет добавлен")
 
-                values = []
-                params = []
+                rows = []
                 for q in normalized_list:
-                    record_id = str(uuid.uuid4())
-                    date_str = str(q['date']) if q['date'] else None
-                    time_str = q['time'][:5] if q['time'] else None
+                    # Дата из нормализатора - строка YYYY-MM-DD или '' для некорректной
+                    date_str = q['date'] or None
+                    time_str = q['time'][:5]
 
                     # Проверяем app_lotw_rxqsl для первого QSO
                     if len(normalized_list) <= 3:
@@ -669,76 +887,68 @@ class DatabaseOperations:
                     if app_lotw_rxqsl_value and isinstance(app_lotw_rxqsl_value, datetime):
                         # Конвертируем datetime в строку ISO формата для PostgreSQL
                         app_lotw_rxqsl_value = app_lotw_rxqsl_value.isoformat()
-                        self.logger.debug(f"🔍 Конвертирован app_lotw_rxqsl в строку: {app_lotw_rxqsl_value}")
-
-                    # Подсчитываем количество полей в VALUES
-                    # id, callsign, my_callsign, band, frequency, mode, date, time, prop_mode, sat_name,
-                    # lotw, paper_qsl, r150s, gridsquare, my_gridsquare, vucc_grids, iota, app_lotw_rxqsl,
-                    # rst_sent, rst_rcvd, state, cqz, ituz, user_id, continent, dxcc, adif_upload_id
-                    # = 27 полей (created_at и updated_at будут NOW() в SQL)
-                    values.append("(%s::uuid, %s, %s, %s, %s, %s, %s::date, %s::time, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())")
-
-                    # Добавляем 27 параметров (created_at и updated_at устанавливаются NOW() в SQL)
-                    params.extend([
-                        record_id,                          # 1. id
-                        q['callsign'],                      # 2. callsign
-                        q['my_callsign'],                   # 3. my_callsign
-                        q['band'],                          # 4. band
-                        q['frequency'],                     # 5. frequency
-                        q['mode'],                          # 6. mode
-                        date_str,                           # 7. date
-                        time_str,                           # 8. time
-                        q['prop_mode'],                     # 9. prop_mode
-                        q['sat_name'],                      # 10. sat_name
-                        q['lotw'],                          # 11. lotw
-                        'N',                                # 12. paper_qsl
-                        q['r150s'],                         # 13. r150s
-                        q['gridsquare'],                    # 14. gridsquare
-                        q['my_gridsquare'],                 # 15. my_gridsquare
-                        q['vucc_grids'],                    # 16. vucc_grids
-                        q['iota'],                          # 17. iota
-                        app_lotw_rxqsl_value,               # 18. app_lotw_rxqsl
-                        q['rst_sent'],                      # 19. rst_sent
-                        q['rst_rcvd'],                      # 20. rst_rcvd
-                        q['state'],                         # 21. state
-                        q['cqz'],                           # 22. cqz
-                        q['ituz'],                          # 23. ituz
-                        user_id,                            # 24. user_id
-                        q['continent'],                     # 25. continent
-                        q['dxcc'],                          # 26. dxcc
-                        None                                # 27. adif_upload_id
-                    ])
-
-                # Формируем запрос с правильным экранированием
-                values_str = ', '.join(values)
-                query = f"""
+                        if debug:
+                            self.logger.debug(f"🔍 Конвертирован app_lotw_rxqsl в строку: {app_lotw_rxqsl_value}")
+
+                    # 26 параметров строки (id, created_at и updated_at заполняет шаблон)
+                    rows.append((
+                        q['callsign'],                      # 1. callsign
+                        q['my_callsign'],                   # 2. my_callsign
+                        q['band'],                          # 3. band
+                        q['frequency'],                     # 4. frequency
+                        q['mode'],                          # 5. mode
+                        date_str,                           # 6. date
+                        time_str,                           # 7. time
+                        q['prop_mode'],                     # 8. prop_mode
+                        q['sat_name'],                      # 9. sat_name
+                        q['lotw'],                          # 10. lotw
+                        'N',                                # 11. paper_qsl
+                        q['r150s'],                         # 12. r150s
+                        q['gridsquare'],                    # 13. gridsquare
+                        q['my_gridsquare'],                 # 14. my_gridsquare
+                        q['vucc_grids'],                    # 15. vucc_grids
+                        q['iota'],                          # 16. iota
+                        app_lotw_rxqsl_value,               # 17. app_lotw_rxqsl
+                        q['rst_sent'],                      # 18. rst_sent
+                        q['rst_rcvd'],                      # 19. rst_rcvd
+                        q['state'],                         # 20. state
+                        q['cqz'],                           # 21. cqz
+                        q['ituz'],                          # 22. ituz
+                        user_id,                            # 23. user_id
+                        q['continent'],                     # 24. continent
+                        q['dxcc'],                          # 25. dxcc
+                        None                                # 26. adif_upload_id
+                    ))
+
+                # Строки подставляет execute_values по шаблону _BATCH_INSERT_TEMPLATE
+                query = """
                     INSERT INTO tlog_qso (
                         id, callsign, my_callsign, band, frequency, mode,
                         date, time, prop_mode, sat_name, lotw, paper_qsl, r150s,
                         gridsquare, my_gridsquare, vucc_grids, iota, app_lotw_rxqsl, rst_sent, rst_rcvd,
                         state, cqz, ituz, user_id, continent, dxcc, adif_upload_id,
                         created_at, updated_at
-                    ) VALUES {values_str}
+                    ) VALUES %s
                     ON CONFLICT ON CONSTRAINT unique_qso DO NOTHING
                     RETURNING 1
                 """
 
-                self.logger.debug(f"🔍 _batch_insert: выполняем SQL запрос с {len(params)} параметрами")
+                self.logger.debug(f"🔍 _batch_insert: выполняем SQL запрос для {len(rows)} строк")
                 self.logger.debug(f"🔍 SQL запрос (первые 500 символов): {query[:500]}...")
-                self.logger.debug(f"🔍 Параметры типы: {[type(p).__name__ for p in params[:10]]}")  # Показываем типы первых 10 параметров
+                self.logger.debug(f"🔍 Параметры типы: {[type(p).__name__ for p in rows[0][:10]]}")  # Показываем типы первых 10 параметров
 
                 try:
-                    # Детальная диагностика проблемного поля
+                    # Детальная диагностика проблемного поля (по первой строке)
                     self.logger.debug("🔍 ДЕТАЛЬНАЯ ДИАГНОСТИКА ПАРАМЕТРОВ:")
                     field_names = [
-                        'id', 'callsign', 'my_callsign', 'band', 'frequency', 'mode',
+                        'callsign', 'my_callsign', 'band', 'frequency', 'mode',
                         'date', 'time', 'prop_mode', 'sat_name', 'lotw', 'paper_qsl', 'r150s',
                         'gridsquare', 'my_gridsquare', 'vucc_grids', 'iota', 'app_lotw_rxqsl',
                         'rst_sent', 'rst_rcvd', 'state', 'cqz', 'ituz', 'user_id',
                         'continent', 'dxcc', 'adif_upload_id'
                     ]
 
-                    for i, param in enumerate(params):
+                    for i, param in enumerate(rows[0]):
                         field_name = field_names[i] if i < len(field_names) else f"field_{i}"
                         param_str = str(param) if param is not None else "NULL"
                         param_length = len(param_str)
@@ -749,16 +959,21 @@ class DatabaseOperations:
                             if param_length > 10:
                                 self.logger.error(f"❌ ПРОБЛЕМНОЕ ПОЛЕ: {field_name} = '{param}' (длина {param_length} > 10)")
 
-                    cur.execute(query, params)
-                    inserted_rows = cur.fetchall()
-                    conn.commit()
+                    if len(rows) >= _BATCH_COPY_THRESHOLD:
+                        inserted_count = self._copy_insert(cur, rows)
+                    else:
+                        # Все страницы выполняются в одной транзакции, RETURNING собирается со всех
+                        inserted_rows = execute_values(
+                            cur, query, rows, template=_BATCH_INSERT_TEMPLATE,
+                            page_size=_BATCH_INSERT_PAGE_SIZE, fetch=True
+                        )
+                        inserted_count = len(inserted_rows)
                 except Exception as sql_error:
                     self.logger.error(f"❌ SQL ошибка при выполнении запроса: {sql_error}")
                     self.logger.error(f"❌ SQL запрос: {query}")
-                    self.logger.error(f"❌ Параметры: {params[:20]}...")  # Показываем первые 20 параметров
+                    self.logger.error(f"❌ Параметры: {rows[0][:20]}...")  # Показываем первые 20 параметров
                     raise sql_error
 
-                inserted_count = len(inserted_rows) if inserted_rows else 0
                 self.logger.info(f"✅ _batch_insert: добавлено {inserted_count} QSO из {len(normalized_list)}")
 
                 if inserted_count == 0 and len(normalized_list) > 0:
@@ -767,12 +982,15 @@ class DatabaseOperations:
                     # Попробуем выполнить одну вставку отдельно для диагностики
                     if len(normalized_list) > 0:
                         self.logger.debug("🔍 Пробуем вставить один QSO отдельно для диагностики...")
+                        # Диагностика идет в общей транзакции пакета - после нее откатываемся
+                        # к точке сохранения, чтобы тестовая вставка не попала в коммит
+                        cur.execute("SAVEPOINT insert_diagnostics")
                         test_q = normalized_list[0]
                         test_record_id = str(uuid.uuid4())
                         test_params = [
                             test_record_id, test_q['callsign'], test_q['my_callsign'],
                             test_q['band'], test_q['frequency'], test_q['mode'],
-                            str(test_q['date']), test_q['time'][:5],
+                            test_q['date'] or None, test_q['time'][:5],
                             test_q['prop_mode'], test_q['sat_name'], test_q['lotw'], 'N', test_q['r150s'],
                             test_q['gridsquare'], test_q['my_gridsquare'], test_q['vucc_grids'], test_q['iota'],
                             test_q['app_lotw_rxqsl'],
@@ -833,124 +1051,110 @@ class DatabaseOperations:
                             except Exception as simple_error:
                                 self.logger.error(f"❌ Ошибка простой вставки: {simple_error}")
 
+                        cur.execute("ROLLBACK TO SAVEPOINT insert_diagnostics")
+
+                cur.execute("RELEASE SAVEPOINT batch_insert")
+
             return inserted_count
 
         except Exception as e:
-            conn.rollback()
             self.logger.error(f"❌ Ошибка batch insert: {e}")
             import traceback
             self.logger.error(f"❌ Stack trace: {traceback.format_exc()}")
-            return 0
+            self._rollback_to_savepoint(conn, 'batch_insert')
+            return None
 
-    def _batch_update(self, normalized_list: List[Dict], existing_qsos: List[Dict], conn) -> int:
-        """Batch обновление существующих QSO данными из LoTW (время не обновляется)"""
-        if not normalized_list or not existing_qsos:
-            return 0
+    def _copy_insert(self, cur, rows: List[tuple]) -> int:
+        """
+        Загружает большой пакет через COPY во временную таблицу и переносит
+        в tlog_qso одним INSERT ... SELECT с пропуском дубликатов.
+        Коммит выполняет вызывающий код.
+        """
+        _copy_to_temp_table(cur, 'tlog_qso_stage', _BATCH_INSERT_COLUMNS, rows)
+        self.logger.debug(f"🔍 _copy_insert: загружено {len(rows)} строк во временную таблицу")
 
-        try:
-            updated = 0
+        cur.execute(f"""
+            INSERT INTO tlog_qso (id, {_BATCH_INSERT_COLUMNS}, created_at, updated_at)
+            SELECT gen_random_uuid(), {_BATCH_INSERT_COLUMNS}, NOW(), NOW() FROM tlog_qso_stage
+            ON CONFLICT ON CONSTRAINT unique_qso DO NOTHING
+        """)
+        return cur.rowcount
 
-            # Создаем курсор для операций
-            with conn.cursor() as cur:
+    def _batch_update(self, matches: List[Tuple[Dict, str]], conn) -> Optional[int]:
+        """
+        Batch обновление существующих QSO данными из LoTW (время не обновляется).
+        Коммит выполняет вызывающий код. Возвращает число обновленных записей
+        или None при ошибке обновления.
 
-                # Сопоставляем normalized_list с existing_qsos по ключу
-                for new_q in normalized_list:
-                    new_time = new_q['time'][:5]
+        Args:
+            matches: пары (новая QSO, id существующей записи), найденные в process_qso_batch
+        """
+        if not matches:
+            return 0
 
-                    for existing in existing_qsos:
-                        # Проверяем совпадение по основным полям
-                        if (new_q['callsign'] == existing['callsign'] and
-                            str(new_q['date']) == str(existing['date']) and
-                            new_q['band'] == existing['band'] and
-                            new_q['mode'] == existing['mode']):
+        try:
+            # Строки для обновления по id существующей записи. Если на одну запись
+            # пришло несколько QSO, остается последняя - как при построчных UPDATE
+            rows_by_id = {}
+            debug = self.logger.isEnabledFor(logging.DEBUG)
 
-                            # Проверяем время с погрешностью ±5 минут
-                            try:
-                                new_seconds = int(new_time.split(':')[0]) * 3600 + int(new_time.split(':')[1]) * 60
-                                ex_time = str(existing['time'])[:5]
-                                existing_seconds = int(ex_time.split(':')[0]) * 3600 + int(ex_time.split(':')[1]) * 60
-                                time_diff = abs(new_seconds - existing_seconds)
-
-                                if time_diff <= 300:  # ±5 минут
-                                    # Обновляем все поля из LoTW (как при повторном QSO)
-                                    updates = []
-                                    values = []
-
-                                    # Логируем app_lotw_rxqsl для отладки
-                                    app_rxqsl_value = new_q.get('app_lotw_rxqsl')
-                                    self.logger.debug(f"🔍 app_lotw_rxqsl для {new_q['callsign']} {new_q['date']} {new_q['time']}: {app_rxqsl_value} (тип: {type(app_rxqsl_value)})")
-
-                                    # Основные поля из LoTW
-                                    updates.extend([
-                                        "frequency = %s",
-                                        "mode = %s",
-                                        "lotw = %s",
-                                        "gridsquare = %s",
-                                        "my_gridsquare = %s",
-                                        "vucc_grids = %s",
-                                        "iota = %s",
-                                        "app_lotw_rxqsl = %s",
-                                        "cqz = %s",
-                                        "ituz = %s",
-                                        "prop_mode = %s",
-                                        "sat_name = %s"
-                                    ])
-                                    values.extend([
-                                        new_q.get('frequency', ''),
-                                        new_q.get('mode', ''),
-                                        new_q.get('lotw', 'N'),
-                                        new_q.get('gridsquare', ''),
-                                        new_q.get('my_gridsquare', ''),
-                                        new_q.get('vucc_grids', ''),
-                                        new_q.get('iota', ''),
-                                        app_rxqsl_value,
-                                        new_q.get('cqz'),
-                                        new_q.get('ituz'),
-                                        new_q.get('prop_mode', ''),
-                                        new_q.get('sat_name', '')
-                                    ])
-
-                                    # Обновляем dxcc только из данных LoTW API (если есть), иначе NULL
-                                    dxcc = new_q.get('dxcc')
-                                    updates.append("dxcc = %s")
-                                    values.append(dxcc)
-
-                                    # Обновляем r150s из r150cty.dat
-                                    r150_info = self._get_r150_info(new_q['callsign'])
-                                    if r150_info and r150_info.get('country'):
-                                        updates.append("r150s = %s")
-                                        values.append(r150_info['country'].upper())
-
-                                    # Дополнительные поля
-                                    # state обновляется всегда (включая NULL)
-                                    updates.append("state = %s")
-                                    values.append(new_q.get('state'))
-                                    if new_q.get('continent'):
-                                        updates.append("continent = %s")
-                                        values.append(new_q['continent'])
-
-                                    # Обновляем временную метку
-                                    updates.append("updated_at = NOW()")
-                                    values.append(existing['id'])
-
-                                    query = f"""
-                                        UPDATE tlog_qso
-                                        SET {', '.join(updates)}
-                                        WHERE id = %s::uuid
-                                    """
-                                    cur.execute(query, values)
-                                    updated += 1
-                                    break
-                            except Exception:
-                                continue
+            for new_q, existing_id in matches:
+                try:
+                    # Логируем app_lotw_rxqsl для отладки
+                    app_rxqsl_value = new_q.get('app_lotw_rxqsl')
+                    if debug:
+                        self.logger.debug(f"🔍 app_lotw_rxqsl для {new_q['callsign']} {new_q['date']} {new_q['time']}: {app_rxqsl_value} (тип: {type(app_rxqsl_value)})")
+
+                    # Порядок полей - как в _BATCH_UPDATE_COLUMNS
+                    rows_by_id[existing_id] = (
+                        existing_id,
+                        new_q.get('frequency', ''),
+                        new_q.get('mode', ''),
+                        new_q.get('lotw', 'N'),
+                        new_q.get('gridsquare', ''),
+                        new_q.get('my_gridsquare', ''),
+                        new_q.get('vucc_grids', ''),
+                        new_q.get('iota', ''),
+                        app_rxqsl_value,
+                        new_q.get('cqz'),
+                        new_q.get('ituz'),
+                        new_q.get('prop_mode', ''),
+                        new_q.get('sat_name', ''),
+                        # dxcc только из данных LoTW API (если есть), иначе NULL
+                        new_q.get('dxcc'),
+                        # r150s из r150cty.dat (уже определен в prepare_qso_data);
+                        # если страна не найдена - остается прежнее значение
+                        new_q['r150s'],
+                        # state обновляется всегда (включая NULL)
+                        new_q.get('state'),
+                        # continent - только если есть значение
+                        new_q.get('continent') or None
+                    )
+                except Exception:
+                    continue
 
-                conn.commit()
-                return updated
+            if not rows_by_id:
+                return 0
+
+            # Одним запросом обновляем все найденные записи (page_size - чтобы запрос
+            # не делился на страницы и rowcount был общим)
+            with conn.cursor() as cur:
+                # Обновление идет в одной транзакции со вставкой новых QSO: при ошибке
+                # откатываем только его, вставленные записи остаются
+                cur.execute("SAVEPOINT batch_update")
+                try:
+                    execute_values(cur, _BATCH_UPDATE_QUERY, list(rows_by_id.values()), page_size=len(rows_by_id))
+                except Exception as e:
+                    self.logger.error(f"❌ Ошибка batch update: {e}")
+                    self._rollback_to_savepoint(conn, 'batch_update')
+                    return None
+                updated_count = cur.rowcount
+                cur.execute("RELEASE SAVEPOINT batch_update")
+                return updated_count
 
         except Exception as e:
-            conn.rollback()
             self.logger.error(f"❌ Ошибка batch update: {e}")
-            return 0
+            return None
 
     def update_lotw_lastsync(self, user_id: int, created_at: Union[str, datetime] = None) -> bool:
         """
@@ -987,11 +1191,7 @@ class DatabaseOperations:
                 else:
                     self.logger.warning(f"🔍 Unexpected type: {type(created_at)}")
 
-                cur.execute("""
-                    UPDATE tlog_radioprofile
-                    SET lotw_lastsync = %s
-                    WHERE user_id = %s
-                """, (created_at, user_id))
+                self._execute_prepared(cur, 'profile_lastsync', (created_at, user_id))
 
                 conn.commit()
 
@@ -1007,4 +1207,4 @@ class DatabaseOperations:
             conn.rollback()
             return False
         finally:
-            conn.close()
\ No newline at end of file
+            self.db_conn.release_connection(conn)
\ No newline at end of file
@@ -2,7 +2,7 @@
 Модуль для обработки сообщений RabbitMQ
 """
 
-import json
+import orjson
 import pika
 from typing import Dict, Any
 from datetime import datetime, timezone
@@ -158,9 +158,25 @@ class MessageHandler:
                 'message': 'Критическая ошибка обработки'
             }
 
+    def _run_in_connection_thread(self, ch, callback):
+        """
+        Выполняет операцию с каналом в потоке соединения pika.
+        Каналы pika не потокобезопасны, а handle_delivery работает в пуле потоков.
+        """
+        def wrapper():
+            try:
+                callback()
+            except Exception as e:
+                self.logger.error(f"Ошибка операции с каналом: {e}")
+
+        try:
+            ch.connection.add_callback_threadsafe(wrapper)
+        except Exception as e:
+            self.logger.error(f"Соединение с RabbitMQ недоступно: {e}")
+
     def handle_delivery(self, ch, method, properties, body):
         """
-        Обработчик доставки сообщений RabbitMQ
+        Обработчик доставки сообщений RabbitMQ (выполняется в пуле потоков)
         """
         task = None
         self.stats.increment_workers()
@@ -174,32 +190,29 @@ class MessageHandler:
 
         def safe_ack():
             """Безопасный ack"""
-            try:
+            def ack():
                 if channel_is_open():
                     ch.basic_ack(delivery_tag=method.delivery_tag)
-            except Exception:
-                pass
+            self._run_in_connection_thread(ch, ack)
 
         def safe_nack(requeue=False):
             """Безопасный nack"""
-            try:
+            def nack():
                 if channel_is_open():
                     ch.basic_nack(delivery_tag=method.delivery_tag, requeue=requeue)
-            except Exception:
-                pass
+            self._run_in_connection_thread(ch, nack)
 
         def safe_publish(exchange, routing_key, body, properties):
             """Безопасный publish"""
-            try:
+            def publish():
                 if channel_is_open():
                     ch.basic_publish(exchange=exchange, routing_key=routing_key, body=body, properties=properties)
                 else:
                     self.logger.warning(f"Канал закрыт, не могу опубликовать сообщение")
-            except Exception as e:
-                self.logger.error(f"Ошибка публикации: {e}")
+            self._run_in_connection_thread(ch, publish)
 
         try:
-            task = json.loads(body.decode('utf-8'))
+            task = orjson.loads(body)
             task_id = task.get('task_id', 'unknown')
 
             result = self.process_task(task)
@@ -224,7 +237,7 @@ class MessageHandler:
                     safe_publish(
                         exchange=RABBITMQ_DELAYED_EXCHANGE,
                         routing_key='delayed',
-                        body=json.dumps(task, ensure_ascii=False),
+                        body=orjson.dumps(task),
                         properties=pika.BasicProperties(
                             delivery_mode=2,
                             content_type='application/json',
@@ -238,7 +251,7 @@ class MessageHandler:
                     safe_nack(requeue=False)
                     self.logger.error(f"Задача {task_id} перемещена в DLQ после {self.max_retries} попыток")
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             self.logger.error(f"Ошибка декодирования JSON: {e}")
             safe_nack(requeue=False)
             self.stats.increment_failed()
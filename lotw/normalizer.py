@@ -3,12 +3,24 @@
 """
 
 import re
+import logging
 from typing import Dict, Any, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 
 from r150s_lookup import get_dxcc_info as get_r150_info
 
 
+# Регулярное выражение и таблица диапазонов создаются один раз, а не на каждую QSO
+_FREQUENCY_RE = re.compile(r'^[\d\.]+$')
+
+_BAND_MAPPING = {
+    '160M': '160M', '80M': '80M', '40M': '40M', '30M': '30M',
+    '20M': '20M', '17M': '17M', '15M': '15M', '12M': '12M',
+    '10M': '10M', '6M': '6M', '2M': '2M', '70CM': '70CM',
+    '23CM': '23CM', '13CM': '13CM',
+}
+
+
 class DataNormalizer:
     """Класс для нормализации данных"""
 
@@ -25,7 +37,7 @@ class DataNormalizer:
         try:
             freq_str = freq_str.strip()
 
-            if not re.match(r'^[\d\.]+$', freq_str):
+            if not _FREQUENCY_RE.match(freq_str):
                 return None
 
             freq_float = float(freq_str)
@@ -46,17 +58,10 @@ class DataNormalizer:
 
         band_str = band_str.upper().strip()
 
-        band_mapping = {
-            '160M': '160M', '80M': '80M', '40M': '40M', '30M': '30M',
-            '20M': '20M', '17M': '17M', '15M': '15M', '12M': '12M',
-            '10M': '10M', '6M': '6M', '2M': '2M', '70CM': '70CM',
-            '23CM': '23CM', '13CM': '13CM',
-        }
-
-        if band_str in band_mapping:
+        if band_str in _BAND_MAPPING:
             return band_str
 
-        for key in band_mapping.keys():
+        for key in _BAND_MAPPING:
             if key in band_str:
                 return key
 
@@ -128,15 +133,22 @@ class DataNormalizer:
         try:
             # Удаляем комментарий (часть после //)
             date_part = rxqsl_str.split('//')[0].strip()
-            self.logger.debug(f"🔍 parse_lotw_rxqsl: исходная строка APP_LOTW_RXQSL='{rxqsl_str}'")
-            self.logger.debug(f"🔍 parse_lotw_rxqsl: извлеченная дата='{date_part}'")
-
-            # Парсим дату в формате "YYYY-MM-DD HH:MM:SS" и делаем timezone-aware (UTC)
-            naive_dt = datetime.strptime(date_part, '%Y-%m-%d %H:%M:%S')
+            debug = self.logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                self.logger.debug(f"🔍 parse_lotw_rxqsl: исходная строка APP_LOTW_RXQSL='{rxqsl_str}'")
+                self.logger.debug(f"🔍 parse_lotw_rxqsl: извлеченная дата='{date_part}'")
+
+            # Парсим дату в формате "YYYY-MM-DD HH:MM:SS" и делаем timezone-aware (UTC).
+            # Строку ровно такого вида разбирает быстрый fromisoformat (разделители на
+            # позициях 4, 7, 10, 13, 16), остальное - strptime, как и раньше
+            if len(date_part) == 19 and date_part[4:17:3] == '-- ::':
+                naive_dt = datetime.fromisoformat(date_part)
+            else:
+                naive_dt = datetime.strptime(date_part, '%Y-%m-%d %H:%M:%S')
             # Делаем datetime timezone-aware (UTC)
-            from datetime import timezone
             result = naive_dt.replace(tzinfo=timezone.utc)
-            self.logger.debug(f"🔍 parse_lotw_rxqsl: результат={result} (тип: {type(result)}, tzinfo: {result.tzinfo})")
+            if debug:
+                self.logger.debug(f"🔍 parse_lotw_rxqsl: результат={result} (тип: {type(result)}, tzinfo: {result.tzinfo})")
             return result
         except (ValueError, IndexError) as e:
             self.logger.error(f"❌ parse_lotw_rxqsl: ошибка парсинга APP_LOTW_RXQSL '{rxqsl_str}': {e}")
@@ -178,8 +190,8 @@ class DataNormalizer:
         my_callsign = my_callsign.upper()  # Сохраняем прописными
 
         # Логируем APP_LOTW_RXQSL для отладки
-        app_rxqsl_raw = qso_data.get('APP_LOTW_RXQSL', '')
-        self.logger.debug(f"🔍 prepare_qso_data: {callsign} APP_LOTW_RXQSL='{app_rxqsl_raw}'")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"🔍 prepare_qso_data: {callsign} APP_LOTW_RXQSL='{qso_data.get('APP_LOTW_RXQSL', '')}'")
 
         # Определяем страну и континент из r150cty.dat
         r150_info = get_r150_info(callsign) if callsign else None
@@ -192,14 +204,12 @@ class DataNormalizer:
 
         # Определяем DXCC только из поля COUNTRY в LoTW API
         # Если данных нет или они NONE, то ничего не вставляется в dxcc
-        dxcc = qso_data.get('COUNTRY', '').upper().strip() if qso_data.get('COUNTRY') else None
+        country = qso_data.get('COUNTRY')
+        dxcc = country.upper().strip() if country else None
 
         # Определяем state из STATE для любых станций
         # state заполняется всегда, если есть значение STATE
-        state = None
-        state_value = qso_data.get('STATE', '').upper()
-        if state_value:
-            state = state_value
+        state = qso_data.get('STATE', '').upper() or None
 
         return {
             'band': self.normalize_band(qso_data.get('BAND', '')),
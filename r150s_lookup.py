@@ -1,8 +1,14 @@
 import re
+import threading
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 import json
 
+# Максимальный размер кэша результатов get_dxcc_info
+LOOKUP_CACHE_SIZE = 65536
+
+_MISSING = object()
+
 @dataclass
 class DXCCEntry:
     """Класс для хранения информации о стране DXCC"""
@@ -40,7 +46,18 @@ class DXCCDatabase:
         self.prefix_map: Dict[str, DXCCEntry] = {}
         self.exact_prefixes: Dict[str, DXCCEntry] = {}
         self.exceptions: List[DXCCException] = []  # Список исключений
+        # Индекс исключений по позывному: поиск по словарю вместо перебора списка.
+        # При повторе позывного действует первое исключение, как и при переборе
+        self._exception_index: Dict[str, DXCCException] = {}
+        # Кэш get_dxcc_info по нормализованному позывному: одни и те же позывные
+        # повторяются в каждом пакете QSO
+        self._lookup_cache: Dict[str, Optional[Tuple]] = {}
         self._load_file(filename)
+        # Позиция каждого точного префикса в exact_prefixes: вместо перебора всех
+        # префиксов проверяются только начала позывного, а приоритет - по позиции
+        self._exact_prefix_order: Dict[str, int] = {
+            prefix: order for order, prefix in enumerate(self.exact_prefixes)
+        }
 
     def _load_file(self, filename: str):
         """Загружает и парсит файл r150cty.dat"""
@@ -245,30 +262,31 @@ class DXCCDatabase:
                         entry_continent=entry.continent
                     )
                     self.exceptions.append(exception)
+                    self._exception_index.setdefault(clean_part, exception)
 
     def find_by_callsign(self, callsign: str) -> Optional[DXCCEntry]:
         """Находит страну DXCC по позывному"""
         callsign = callsign.upper().strip()
 
         # Сначала проверяем исключения (=позывные) для этого конкретного позывного
-        for exception in self.exceptions:
-            if callsign == exception.callsign_or_prefix:
-                # Используем данные из записи, где определено исключение (Antarctica)
-                # Используем альтернативные зоны, если они указаны
-                final_cq_zone = exception.cq_zone_alt if exception.cq_zone_alt is not None else exception.cq_zone
-                final_itu_zone = exception.itu_zone_alt if exception.itu_zone_alt is not None else exception.itu_zone
-
-                return DXCCEntry(
-                    name=exception.entry_name if exception.entry_name else exception.primary_prefix,
-                    cq_zone=final_cq_zone,
-                    itu_zone=final_itu_zone,
-                    continent=exception.entry_continent if exception.entry_continent else "",
-                    lat=exception.entry_lat if exception.entry_lat is not None else 0.0,
-                    lon=exception.entry_lon if exception.entry_lon is not None else 0.0,
-                    timezone=0.0,
-                    primary_prefix=exception.primary_prefix,
-                    prefixes=[]
-                )
+        exception = self._exception_index.get(callsign)
+        if exception is not None:
+            # Используем данные из записи, где определено исключение (Antarctica)
+            # Используем альтернативные зоны, если они указаны
+            final_cq_zone = exception.cq_zone_alt if exception.cq_zone_alt is not None else exception.cq_zone
+            final_itu_zone = exception.itu_zone_alt if exception.itu_zone_alt is not None else exception.itu_zone
+
+            return DXCCEntry(
+                name=exception.entry_name if exception.entry_name else exception.primary_prefix,
+                cq_zone=final_cq_zone,
+                itu_zone=final_itu_zone,
+                continent=exception.entry_continent if exception.entry_continent else "",
+                lat=exception.entry_lat if exception.entry_lat is not None else 0.0,
+                lon=exception.entry_lon if exception.entry_lon is not None else 0.0,
+                timezone=0.0,
+                primary_prefix=exception.primary_prefix,
+                prefixes=[]
+            )
 
         # Затем ищем в обычных префиксах (от длинных к коротким)
         for length in range(len(callsign), 0, -1):
@@ -277,31 +295,27 @@ class DXCCDatabase:
                 return self.prefix_map[prefix]
 
         # Если не найдено в обычной базе, проверяем точные совпадения (=позывные)
-        for exact_prefix in self.exact_prefixes:
-            if callsign.startswith(exact_prefix):
-                return self.exact_prefixes[exact_prefix]
+        exact_prefix = self._first_exact_prefix(callsign, False)
+        if exact_prefix is not None:
+            return self.exact_prefixes[exact_prefix]
 
         return None
 
     def get_dxcc_info(self, callsign: str) -> Optional[Dict]:
-        """Возвращает информацию о стране DXCC для позывного"""
-        entry = self.find_by_callsign(callsign)
-
-        if not entry:
+        """Возвращает информацию о стране DXCC для позывного (поиск кэшируется)"""
+        normalized = callsign.upper().strip()
+        cached = self._lookup_cache.get(normalized, _MISSING)
+        if cached is _MISSING:
+            cached = self._lookup_dxcc_info(normalized)
+            if len(self._lookup_cache) >= LOOKUP_CACHE_SIZE:
+                self._lookup_cache.clear()
+            self._lookup_cache[normalized] = cached
+
+        if cached is None:
             return None
 
-        matched_prefix = self._find_matched_prefix(callsign)
-
-        # Проверяем, есть ли альтернативные зоны для этого позывного
-        cq_zone_alt = None
-        itu_zone_alt = None
-        callsign_upper = callsign.upper().strip()
-        for exception in self.exceptions:
-            if callsign_upper == exception.callsign_or_prefix:
-                cq_zone_alt = exception.cq_zone_alt
-                itu_zone_alt = exception.itu_zone_alt
-                break
-
+        # Словарь собирается заново: вызывающий код может его изменять
+        entry, matched_prefix, cq_zone_alt, itu_zone_alt = cached
         return {
             'callsign': callsign,
             'country': entry.name,
@@ -318,16 +332,58 @@ class DXCCDatabase:
             'itu_zone_alt': itu_zone_alt
         }
 
+    def _lookup_dxcc_info(self, callsign: str) -> Optional[Tuple]:
+        """
+        Кэшируемая часть get_dxcc_info для нормализованного позывного:
+        (запись, сопоставленный префикс, альтернативные CQ и ITU зоны)
+        """
+        entry = self.find_by_callsign(callsign)
+
+        if not entry:
+            return None
+
+        matched_prefix = self._find_matched_prefix(callsign)
+
+        # Проверяем, есть ли альтернативные зоны для этого позывного
+        cq_zone_alt = None
+        itu_zone_alt = None
+        exception = self._exception_index.get(callsign)
+        if exception is not None:
+            cq_zone_alt = exception.cq_zone_alt
+            itu_zone_alt = exception.itu_zone_alt
+
+        return entry, matched_prefix, cq_zone_alt, itu_zone_alt
+
+    def _first_exact_prefix(self, callsign: str, separated: bool) -> Optional[str]:
+        """
+        Точный префикс, с которого начинается позывной; из нескольких подходящих -
+        раньше всех добавленный в exact_prefixes, как при их переборе по порядку.
+        При separated=True за префиксом должен идти конец позывного, буква или цифра
+        """
+        best_prefix = None
+        best_order = len(self._exact_prefix_order)
+        for length in range(len(callsign) + 1):
+            prefix = callsign[:length]
+            order = self._exact_prefix_order.get(prefix)
+            if order is None or order >= best_order:
+                continue
+            if separated:
+                remaining = callsign[length:]
+                if remaining and not (remaining[0].isdigit() or remaining[0].isalpha()):
+                    continue
+            best_prefix = prefix
+            best_order = order
+
+        return best_prefix
+
     def _find_matched_prefix(self, callsign: str) -> Optional[str]:
         """Находит префикс, который соответствует позывному"""
         callsign = callsign.upper().strip()
 
         # Сначала проверяем точные совпадения
-        for exact_prefix in self.exact_prefixes:
-            if callsign.startswith(exact_prefix):
-                remaining = callsign[len(exact_prefix):]
-                if not remaining or remaining[0].isdigit() or remaining[0].isalpha():
-                    return exact_prefix
+        exact_prefix = self._first_exact_prefix(callsign, True)
+        if exact_prefix is not None:
+            return exact_prefix
 
         # Затем обычные префиксы
         for length in range(len(callsign), 0, -1):
@@ -366,6 +422,8 @@ class DXCCDatabase:
 
 # Глобальный экземпляр базы данных
 _dxcc_db = None
+# Защищает от повторного парсинга, если база запрошена из нескольких потоков сразу
+_dxcc_db_lock = threading.Lock()
 
 def init_database(filename: str = "r150cty.dat") -> DXCCDatabase:
     """Инициализирует базу данных DXCC"""
@@ -373,6 +431,20 @@ def init_database(filename: str = "r150cty.dat") -> DXCCDatabase:
     _dxcc_db = DXCCDatabase(filename)
     return _dxcc_db
 
+def load_database(filename: str = "r150cty.dat") -> DXCCDatabase:
+    """
+    Возвращает глобальную базу данных, загружая ее при первом обращении.
+    Потоки, обратившиеся во время загрузки, ждут ее завершения.
+    """
+    global _dxcc_db
+
+    if _dxcc_db is None:
+        with _dxcc_db_lock:
+            if _dxcc_db is None:
+                init_database(filename)
+
+    return _dxcc_db
+
 def get_dxcc_info(callsign: str, filename: str = "r150cty.dat") -> Optional[Dict]:
     """
     Основная функция для получения информации о стране DXCC по позывному.
@@ -384,12 +456,7 @@ def get_dxcc_info(callsign: str, filename: str = "r150cty.dat") -> Optional[Dict
     Returns:
         Словарь с информацией о стране или None если не найдено
     """
-    global _dxcc_db
-
-    if _dxcc_db is None:
-        _dxcc_db = init_database(filename)
-
-    return _dxcc_db.get_dxcc_info(callsign)
+    return load_database(filename).get_dxcc_info(callsign)
 
 def print_dxcc_info(callsign: str, filename: str = "r150cty.dat"):
     """
@@ -10,7 +10,7 @@ from config import (
     RABBITMQ_HOST, RABBITMQ_PORT, RABBITMQ_QUEUE, RABBITMQ_EXCHANGE,
     RABBITMQ_USER, RABBITMQ_PASSWORD,
     RABBITMQ_DELAYED_QUEUE, RABBITMQ_DELAYED_EXCHANGE, RABBITMQ_DLX_EXCHANGE,
-    RABBITMQ_HEARTBEAT, RABBITMQ_TIMEOUT
+    RABBITMQ_HEARTBEAT, RABBITMQ_TIMEOUT, RABBITMQ_PREFETCH, RETRY_DELAY_MS
 )
 
 
@@ -104,7 +104,6 @@ class RabbitMQConnection:
             self.logger.debug(f"Привязка: {RABBITMQ_QUEUE} -> {RABBITMQ_EXCHANGE}")
 
             # 5. Создаем отложенную очередь с TTL
-            from config import RETRY_DELAY_MS
             self.channel.queue_declare(
                 queue=RABBITMQ_DELAYED_QUEUE,
                 durable=True,
@@ -140,9 +139,6 @@ class RabbitMQConnection:
             )
             self.logger.debug(f"Привязка DLX: {RABBITMQ_QUEUE} -> {RABBITMQ_DLX_EXCHANGE}")
 
-            # Настраиваем QoS - обрабатываем по 1 сообщению за раз
-            self.channel.basic_qos(prefetch_count=1)
-
             self.logger.info(f"Успешно подключено к RabbitMQ")
             self.logger.info(f"Прослушиваю очередь: {RABBITMQ_QUEUE}")
             self.logger.info(f"Максимум воркеров: {self.max_workers}")
@@ -166,6 +162,12 @@ class RabbitMQConnection:
             return
 
         try:
+            # Настраиваем QoS - брокер держит очередь сообщений наготове,
+            # не дожидаясь ack предыдущего
+            prefetch_count = max(RABBITMQ_PREFETCH, self.max_workers * 10)
+            self.channel.basic_qos(prefetch_count=prefetch_count, global_qos=False)
+            self.logger.info(f"Prefetch: {prefetch_count}")
+
             self.channel.basic_consume(
                 queue=RABBITMQ_QUEUE,
                 on_message_callback=message_handler,
@@ -179,6 +181,30 @@ class RabbitMQConnection:
             self.logger.error(f"Ошибка при прослушивании очереди: {e}")
             raise
 
+    def request_stop(self):
+        """
+        Просит остановить прием сообщений (можно вызывать из обработчика сигнала):
+        stop_consuming выполнится в цикле соединения, и start_consuming вернется
+        """
+        try:
+            if self.connection and self.connection.is_open:
+                self.connection.add_callback_threadsafe(self.channel.stop_consuming)
+        except Exception as e:
+            self.logger.error(f"Ошибка при остановке прослушивания: {e}")
+
+    def process_events(self, time_limit: float) -> bool:
+        """
+        Обслуживает соединение (ack и publish из других потоков) до time_limit секунд.
+        Возвращает False, если соединение недоступно
+        """
+        try:
+            if self.connection and self.connection.is_open:
+                self.connection.process_data_events(time_limit=time_limit)
+                return True
+        except Exception as e:
+            self.logger.error(f"Ошибка обслуживания соединения: {e}")
+        return False
+
     def close(self):
         """Корректное закрытие соединения"""
         try:
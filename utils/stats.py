@@ -2,14 +2,20 @@
 Модуль для работы со статистикой
 """
 
+import threading
 from datetime import datetime
 from typing import Dict, Any
 
+from config import RABBITMQ_QUEUE, RABBITMQ_HOST, RABBITMQ_PORT, RABBITMQ_USER
+from config import DB_HOST, DB_PORT, DB_NAME, DB_SCHEMA
+
 
 class Statistics:
     """Класс для сбора и отображения статистики"""
 
     def __init__(self, test_mode: bool = False):
+        # Счетчики обновляются из потоков обработки сообщений
+        self._lock = threading.Lock()
         self.stats = {
             'processed': 0,
             'failed': 0,
@@ -28,31 +34,36 @@ class Statistics:
 
     def increment_processed(self, callsign: str, username: str):
         """Увеличивает счетчик обработанных задач"""
-        self.stats['processed'] += 1
+        with self._lock:
+            self.stats['processed'] += 1
 
-        if callsign not in self.stats['by_callsign']:
-            self.stats['by_callsign'][callsign] = 0
-        self.stats['by_callsign'][callsign] += 1
+            if callsign not in self.stats['by_callsign']:
+                self.stats['by_callsign'][callsign] = 0
+            self.stats['by_callsign'][callsign] += 1
 
-        if username not in self.stats['by_user']:
-            self.stats['by_user'][username] = 0
-        self.stats['by_user'][username] += 1
+            if username not in self.stats['by_user']:
+                self.stats['by_user'][username] = 0
+            self.stats['by_user'][username] += 1
 
     def increment_failed(self):
         """Увеличивает счетчик неудачных задач"""
-        self.stats['failed'] += 1
+        with self._lock:
+            self.stats['failed'] += 1
 
     def increment_retried(self):
         """Увеличивает счетчик повторенных задач"""
-        self.stats['retried'] += 1
+        with self._lock:
+            self.stats['retried'] += 1
 
     def increment_workers(self):
         """Увеличивает счетчик активных воркеров"""
-        self.stats['current_workers'] += 1
+        with self._lock:
+            self.stats['current_workers'] += 1
 
     def decrement_workers(self):
         """Уменьшает счетчик активных воркеров"""
-        self.stats['current_workers'] -= 1
+        with self._lock:
+            self.stats['current_workers'] -= 1
 
     def update_worker_count(self, count: int):
         """Обновляет количество воркеров"""
@@ -64,16 +75,14 @@ class Statistics:
 
     def update_qso_stats(self, added: int = 0, updated: int = 0, skipped: int = 0, duplicates: int = 0):
         """Обновляет статистику QSO"""
-        self.stats['qso_added'] += added
-        self.stats['qso_updated'] += updated
-        self.stats['qso_skipped'] += skipped
-        self.stats['duplicates'] += duplicates
+        with self._lock:
+            self.stats['qso_added'] += added
+            self.stats['qso_updated'] += updated
+            self.stats['qso_skipped'] += skipped
+            self.stats['duplicates'] += duplicates
 
     def print_stats(self, detailed: bool = False):
         """Вывод статистики"""
-        from config import RABBITMQ_QUEUE, RABBITMQ_HOST, RABBITMQ_PORT, RABBITMQ_USER
-        from config import DB_HOST, DB_PORT, DB_NAME, DB_SCHEMA
-
         print("\n" + "="*60)
         print("📊 СТАТИСТИКА КОНСЬЮМЕРА LOTW")
         print("="*60)